@@ -5,7 +5,7 @@ import subprocess
 import sys
 import os
 from datetime import datetime
-import json
+import orjson
 
 
 def run_tests(test_path: str = "tests", markers: list = None) -> bool:
@@ -26,22 +26,21 @@ def run_tests(test_path: str = "tests", markers: list = None) -> bool:
         marker_expr = " or ".join(markers)
         cmd.extend(["-m", marker_expr])
     
+    # pytest.ini runs files across all cores; PYTEST_PARALLEL=0 keeps one process
+    if os.getenv("PYTEST_PARALLEL") == "0":
+        cmd.extend(["-n", "0"])
+    
     # Add coverage options
     cmd.extend([
         "--cov=src",
+        "--cov-context=test",
         "--cov-report=term-missing",
         "--cov-report=html",
         "--cov-report=json"
     ])
     
-    # Run tests
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    # Print output
-    print(result.stdout)
-    if result.stderr:
-        print("Errors:", file=sys.stderr)
-        print(result.stderr, file=sys.stderr)
+    # Run tests, letting pytest write straight to our stdout/stderr
+    result = subprocess.run(cmd)
     
     return result.returncode == 0
 
@@ -50,8 +49,8 @@ def generate_test_report(output_file: str = "test_report.json"):
     """Generate a comprehensive test report."""
     try:
         # Read coverage data
-        with open("coverage.json") as f:
-            coverage_data = json.load(f)
+        with open("coverage.json", "rb") as f:
+            coverage_data = orjson.loads(f.read())
         
         # Generate report
         report = {
@@ -62,20 +61,20 @@ def generate_test_report(output_file: str = "test_report.json"):
                 "coverage_percent": coverage_data["totals"]["percent_covered"],
                 "missing_statements": coverage_data["totals"]["missing_statements"]
             },
-            "files": {}
-        }
-        
-        # Add per-file metrics
-        for file_path, metrics in coverage_data["files"].items():
-            report["files"][file_path] = {
-                "coverage_percent": metrics["summary"]["percent_covered"],
-                "missing_lines": metrics["missing_lines"],
-                "excluded_lines": metrics["excluded_lines"]
+            # Per-file metrics
+            "files": {
+                file_path: {
+                    "coverage_percent": metrics["summary"]["percent_covered"],
+                    "missing_lines": metrics["missing_lines"],
+                    "excluded_lines": metrics["excluded_lines"]
+                }
+                for file_path, metrics in coverage_data["files"].items()
             }
+        }
         
         # Save report
-        with open(output_file, "w") as f:
-            json.dump(report, f, indent=2)
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
             
         print(f"\nTest report saved to {output_file}")
         
@@ -0,0 +1,148 @@
+"""
+Request batching for the Scene+ recommendation service.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+
+class OfferBatcher:
+    """Coalesces concurrent offer requests into one engine call per batch, run in an executor."""
+
+    def __init__(
+        self,
+        recommendation_engine: Any,
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            recommendation_engine: Engine exposing generate_offers()
+            max_batch: Maximum number of requests per engine call
+            max_wait_ms: Longest time to hold a request while a batch fills
+        """
+        self.recommendation_engine = recommendation_engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background batching loop on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching loop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(
+        self,
+        customer_id: str,
+        customer_data: pd.DataFrame,
+        segment_data: pd.DataFrame,
+        n_offers: int
+    ) -> List[Any]:
+        """
+        Queue a customer for offer generation and wait for the result.
+
+        Args:
+            customer_id: Customer to generate offers for
+            customer_data: Customer transaction data
+            segment_data: Customer segment assignment
+            n_offers: Number of offers to return
+
+        Returns:
+            List: Offers generated for the customer
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((customer_id, customer_data, segment_data, n_offers, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect queued requests into batches and process them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._process(batch)
+
+    async def _process(self, batch: List[Tuple]) -> None:
+        """Generate offers for a batch off the event loop and resolve each waiting request."""
+        # Concurrent requests for one customer share a single generation
+        requests: Dict[str, Tuple[pd.DataFrame, pd.DataFrame, int]] = {}
+        for customer_id, customer_data, segment_data, n_offers, _ in batch:
+            previous = requests.get(customer_id)
+            if previous is not None:
+                n_offers = max(n_offers, previous[2])
+            requests[customer_id] = (customer_data, segment_data, n_offers)
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, self._generate, requests
+            )
+        except Exception as e:
+            results = dict.fromkeys(requests, e)
+
+        for customer_id, _, _, n_offers, future in batch:
+            if future.done():
+                continue
+            result = results[customer_id]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result[:n_offers])
+
+    def _generate(
+        self,
+        requests: Dict[str, Tuple[pd.DataFrame, pd.DataFrame, int]]
+    ) -> Dict[str, Union[List[Any], Exception]]:
+        """
+        Offers, or the error raised, for each requested customer.
+
+        The batch is scored in one generate_offers call on the concatenated
+        frames, with per_customer scaling so each customer's offers match an
+        unbatched call. Offers are ranked best first, so generating the
+        largest requested count and slicing gives each smaller count. Only
+        columns shared by every request are kept, so a request missing one
+        fails the batch call instead of being filled with nulls; customers
+        are then retried one at a time so one bad request does not fail the
+        others.
+        """
+        n_offers = max(request[2] for request in requests.values())
+        try:
+            offers = self.recommendation_engine.generate_offers(
+                pd.concat([request[0] for request in requests.values()], join='inner', ignore_index=True),
+                pd.concat([request[1] for request in requests.values()], join='inner', ignore_index=True),
+                n_offers=n_offers,
+                per_customer=True
+            )
+            return {customer_id: offers.get(customer_id, []) for customer_id in requests}
+        except Exception:
+            if len(requests) == 1:
+                raise
+
+        results: Dict[str, Union[List[Any], Exception]] = {}
+        for customer_id, request in requests.items():
+            try:
+                results[customer_id] = self._generate({customer_id: request})[customer_id]
+            except Exception as e:
+                results[customer_id] = e
+        return results
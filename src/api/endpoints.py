@@ -1,26 +1,35 @@
 """
 FastAPI endpoints for Scene+ recommendation service.
 """
+import asyncio
+import os
 import uuid
 from typing import List, Optional
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+import orjson
+import pandas as pd
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
+from .batching import OfferBatcher
 from .models import (
-    CustomerProfile, OfferRequest, OfferResponse, OfferList,
+    CustomerProfile, OfferRequest, OfferResponse,
     OfferEvent, ErrorResponse
 )
 from models.customer_segmentation import CustomerSegmentation
 from models.recommendation import RecommendationEngine, Offer
-from data_pipeline.connectors.factory import ConnectorFactory
+from data_pipeline.connectors.base import BaseConnector
+from data_pipeline.connectors.postgres import PostgresConnector, PostgresConfig
+from monitoring.metrics import MetricsMiddleware, flush_request_metrics, run_metrics_flusher
 
 
 app = FastAPI(
     title="Scene+ Recommendation API",
     description="API for personalized Scene+ offers and recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -32,10 +41,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request count and latency metrics
+app.add_middleware(MetricsMiddleware)
+
 # Initialize models
 segmentation_model = CustomerSegmentation(n_clusters=5)
 recommendation_engine = RecommendationEngine()
 
+# Read-through caches for profiles and offer definitions, which change rarely
+customer_cache: TTLCache = TTLCache(maxsize=100_000, ttl=60)
+offer_cache: TTLCache = TTLCache(maxsize=100_000, ttl=60)
+segment_cache: TTLCache = TTLCache(maxsize=100_000, ttl=300)
+
 # Load pre-trained models
 try:
     segmentation_model.load_model("models/customer_segmentation_model.joblib")
@@ -43,6 +60,83 @@ except Exception as e:
     print(f"Warning: Could not load segmentation model: {e}")
 
 
+# Connection settings are resolved once per process; the pool budget is split
+# across API_WORKERS since each worker builds its own pool after fork
+POSTGRES_CFG = PostgresConfig(
+    name="retail",
+    type="postgres",
+    host="localhost",
+    port=5432,
+    database="scene_plus_db",
+    user="user",
+    password="password",
+    schema="retail",
+    pool_size=max(1, 20 // int(os.getenv("API_WORKERS", "1")))
+)
+
+
+@app.on_event("startup")
+async def startup():
+    """Create this worker's Postgres connector, offer batcher and metrics flusher."""
+    app.state.db = PostgresConnector(POSTGRES_CFG)
+    await app.state.db.connect()
+    app.state.offer_batcher = OfferBatcher(recommendation_engine)
+    await app.state.offer_batcher.start()
+    app.state.metrics_flusher = asyncio.create_task(run_metrics_flusher())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks, flush buffered metrics and dispose of the Postgres pool."""
+    app.state.metrics_flusher.cancel()
+    try:
+        await app.state.metrics_flusher
+    except asyncio.CancelledError:
+        pass
+    flush_request_metrics()
+    await app.state.offer_batcher.stop()
+    await app.state.db.disconnect()
+
+
+def get_db(request: Request) -> BaseConnector:
+    """Dependency returning the pooled Postgres connector."""
+    return request.app.state.db
+
+
+def get_offer_batcher(request: Request) -> OfferBatcher:
+    """Dependency returning the shared offer batcher."""
+    return request.app.state.offer_batcher
+
+
+def predict_segment(customer_id: str, customer_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Predict a customer's segment, reusing the result while their data is unchanged.
+    
+    Args:
+        customer_id: Customer the data belongs to
+        customer_data: Customer transaction data
+        
+    Returns:
+        DataFrame: Segment assignment as returned by the segmentation model
+    """
+    fingerprint = pd.util.hash_pandas_object(
+        customer_data.astype(str), index=False
+    ).values.tobytes()
+    key = (customer_id, fingerprint)
+    
+    segment = segment_cache.get(key)
+    if segment is None:
+        segment = segmentation_model.predict(customer_data)
+        segment_cache[key] = segment
+    return segment
+
+
+def new_offer_ids(n: int) -> List[str]:
+    """Generate n random UUID4 strings from a single urandom read."""
+    raw = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * n, 16)]
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -50,206 +144,148 @@ async def health_check():
 
 
 @app.get("/customer/{customer_id}", response_model=CustomerProfile)
-async def get_customer_profile(customer_id: str):
+async def get_customer_profile(customer_id: str, conn: BaseConnector = Depends(get_db)):
     """Get customer profile with segment information."""
-    try:
-        # Get customer data from database
-        connector = ConnectorFactory.create_connector("postgres", {
-            "name": "retail",
-            "type": "postgres",
-            "host": "localhost",
-            "port": 5432,
-            "database": "scene_plus_db",
-            "user": "user",
-            "password": "password",
-            "schema": "retail"
-        })
-        
-        async with connector as conn:
-            customer_data = await conn.fetch_customer(customer_id)
-            
-        if not customer_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Customer {customer_id} not found"
-            )
-        
-        # Get customer segment
-        segment = segmentation_model.predict(customer_data)
-        
-        return CustomerProfile(
-            customer_id=customer_id,
-            segment_id=segment['segment'].iloc[0],
-            segment_description=segment['segment_description'].iloc[0],
-            total_points=customer_data['total_points'].iloc[0],
-            preferred_banner=customer_data['preferred_banner'].iloc[0],
-            join_date=customer_data['join_date'].iloc[0],
-            last_activity=customer_data['last_activity'].iloc[0]
-        )
-        
-    except Exception as e:
+    cached = customer_cache.get(customer_id)
+    if cached is not None:
+        return cached
+    
+    # Get customer data from database
+    customer_data = await conn.fetch_customer(customer_id)
+    
+    if not customer_data:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=404,
+            detail=f"Customer {customer_id} not found"
         )
+    
+    # Get customer segment
+    segment = predict_segment(customer_id, customer_data)
+    
+    profile = CustomerProfile(
+        customer_id=customer_id,
+        segment_id=segment['segment'].iloc[0],
+        segment_description=segment['segment_description'].iloc[0],
+        total_points=customer_data['total_points'].iloc[0],
+        preferred_banner=customer_data['preferred_banner'].iloc[0],
+        join_date=customer_data['join_date'].iloc[0],
+        last_activity=customer_data['last_activity'].iloc[0]
+    )
+    customer_cache[customer_id] = profile
+    return profile
 
 
-@app.post("/offers/generate", response_model=OfferList)
-async def generate_offers(request: OfferRequest, background_tasks: BackgroundTasks):
-    """Generate personalized offers for a customer."""
-    try:
-        # Get customer data
-        connector = ConnectorFactory.create_connector("postgres", {
-            "name": "retail",
-            "type": "postgres",
-            "host": "localhost",
-            "port": 5432,
-            "database": "scene_plus_db",
-            "user": "user",
-            "password": "password",
-            "schema": "retail"
-        })
-        
-        async with connector as conn:
-            customer_data = await conn.fetch_customer(request.customer_id)
-            
-        if not customer_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Customer {request.customer_id} not found"
-            )
-        
-        # Generate offers
-        customer_offers = recommendation_engine.generate_offers(
-            customer_data,
-            segmentation_model.predict(customer_data),
-            n_offers=request.count
-        )
-        
-        # Convert offers to response format
-        offers = []
-        for offer in customer_offers[request.customer_id]:
-            offer_dict = offer.to_dict()
-            offer_dict['offer_id'] = str(uuid.uuid4())
-            offers.append(OfferResponse(**offer_dict))
-        
-        # Track offer generation in background
-        background_tasks.add_task(
-            track_offer_event,
-            customer_id=request.customer_id,
-            offers=[o.offer_id for o in offers],
-            event_type="generate"
-        )
-        
-        return OfferList(
-            customer_id=request.customer_id,
-            offers=offers,
-            metadata={"context": request.context}
-        )
-        
-    except Exception as e:
+@app.post("/offers/generate", response_class=StreamingResponse)
+async def generate_offers(
+    request: OfferRequest,
+    background_tasks: BackgroundTasks,
+    conn: BaseConnector = Depends(get_db),
+    batcher: OfferBatcher = Depends(get_offer_batcher)
+):
+    """Generate personalized offers for a customer, streamed as NDJSON.
+
+    The first line holds the customer ID, generation time and metadata;
+    each following line is one offer.
+    """
+    # Get customer data
+    customer_data = await conn.fetch_customer(request.customer_id)
+    
+    if not customer_data:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=404,
+            detail=f"Customer {request.customer_id} not found"
         )
+    
+    # Generate offers, batched with other in-flight requests
+    customer_offers = await batcher.submit(
+        request.customer_id,
+        customer_data,
+        predict_segment(request.customer_id, customer_data),
+        request.count
+    )
+    
+    offer_ids = new_offer_ids(len(customer_offers))
+    
+    # Track offer generation in background
+    background_tasks.add_task(
+        track_offer_event,
+        customer_id=request.customer_id,
+        offers=offer_ids,
+        event_type="generate"
+    )
+    
+    def offer_iter():
+        yield orjson.dumps({
+            "customer_id": request.customer_id,
+            "generated_at": datetime.now(),
+            "metadata": {"context": request.context}
+        }) + b"\n"
+        for offer_id, offer in zip(offer_ids, customer_offers):
+            offer_dict = offer.to_dict()
+            offer_dict['offer_id'] = offer_id
+            yield orjson.dumps(offer_dict) + b"\n"
+    
+    return StreamingResponse(offer_iter(), media_type="application/x-ndjson")
 
 
 @app.post("/offers/track", response_model=OfferEvent)
 async def track_offer_event(
     event: OfferEvent,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    conn: BaseConnector = Depends(get_db)
 ):
     """Track offer-related events."""
-    try:
-        # Validate event type
-        valid_events = ["view", "click", "redeem"]
-        if event.event_type not in valid_events:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid event type. Must be one of: {valid_events}"
-            )
-        
-        # Store event in database
-        connector = ConnectorFactory.create_connector("postgres", {
-            "name": "retail",
-            "type": "postgres",
-            "host": "localhost",
-            "port": 5432,
-            "database": "scene_plus_db",
-            "user": "user",
-            "password": "password",
-            "schema": "retail"
-        })
-        
-        async with connector as conn:
-            await conn.store_offer_event(event.dict())
-        
-        # Update offer metrics in background
-        background_tasks.add_task(
-            update_offer_metrics,
-            offer_id=event.offer_id,
-            event_type=event.event_type
-        )
-        
-        return event
-        
-    except Exception as e:
+    # Validate event type
+    valid_events = ["view", "click", "redeem"]
+    if event.event_type not in valid_events:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=400,
+            detail=f"Invalid event type. Must be one of: {valid_events}"
         )
+    
+    # Store event in database
+    await conn.store_offer_event(event.model_dump())
+    
+    # Redemptions change the points balance held in the cached profile
+    if event.event_type == "redeem":
+        customer_cache.pop(event.customer_id, None)
+    
+    # Update offer metrics in background
+    background_tasks.add_task(
+        update_offer_metrics,
+        conn,
+        offer_id=event.offer_id,
+        event_type=event.event_type
+    )
+    
+    return event
 
 
 @app.get("/offers/{offer_id}", response_model=OfferResponse)
-async def get_offer(offer_id: str):
+async def get_offer(offer_id: str, conn: BaseConnector = Depends(get_db)):
     """Get details of a specific offer."""
-    try:
-        connector = ConnectorFactory.create_connector("postgres", {
-            "name": "retail",
-            "type": "postgres",
-            "host": "localhost",
-            "port": 5432,
-            "database": "scene_plus_db",
-            "user": "user",
-            "password": "password",
-            "schema": "retail"
-        })
-        
-        async with connector as conn:
-            offer_data = await conn.fetch_offer(offer_id)
-            
-        if not offer_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Offer {offer_id} not found"
-            )
-        
-        return OfferResponse(**offer_data)
-        
-    except Exception as e:
+    cached = offer_cache.get(offer_id)
+    if cached is not None:
+        return cached
+    
+    offer_data = await conn.fetch_offer(offer_id)
+    
+    if not offer_data:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=404,
+            detail=f"Offer {offer_id} not found"
         )
+    
+    offer = OfferResponse.model_validate(offer_data)
+    offer_cache[offer_id] = offer
+    return offer
 
 
-async def update_offer_metrics(offer_id: str, event_type: str):
+async def update_offer_metrics(conn: BaseConnector, offer_id: str, event_type: str):
     """Background task to update offer metrics."""
     try:
-        connector = ConnectorFactory.create_connector("postgres", {
-            "name": "retail",
-            "type": "postgres",
-            "host": "localhost",
-            "port": 5432,
-            "database": "scene_plus_db",
-            "user": "user",
-            "password": "password",
-            "schema": "retail"
-        })
+        await conn.update_offer_metrics(offer_id, event_type)
         
-        async with connector as conn:
-            await conn.update_offer_metrics(offer_id, event_type)
-            
     except Exception as e:
         print(f"Error updating offer metrics: {e}")
 
@@ -257,11 +293,24 @@ async def update_offer_metrics(offer_id: str, event_type: str):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             error_code=str(exc.status_code),
             message=exc.detail,
             details={"path": str(request.url)}
-        ).dict()
-    ) 
\ No newline at end of file
+        ).model_dump()
+    )
+
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request, exc):
+    """Fallback handler returning unexpected errors as a 500 ErrorResponse."""
+    return ORJSONResponse(
+        status_code=500,
+        content=ErrorResponse(
+            error_code="500",
+            message="Internal server error",
+            details={"path": str(request.url)}
+        ).model_dump()
+    )
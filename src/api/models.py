@@ -1,5 +1,5 @@
 """
-API data models using Pydantic.
+API data models using Pydantic v2.
 """
 from typing import List, Optional, Dict, Any
 from datetime import datetime
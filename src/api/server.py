@@ -1,9 +1,12 @@
 """
 Script to run the Scene+ recommendation API server.
 """
-import uvicorn
 import os
+from pathlib import Path
+import uvicorn
 from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
 
 # Load environment variables
 load_dotenv()
@@ -12,15 +15,69 @@ load_dotenv()
 HOST = os.getenv("API_HOST", "0.0.0.0")
 PORT = int(os.getenv("API_PORT", "8000"))
 DEBUG = os.getenv("API_DEBUG", "False").lower() == "true"
-WORKERS = int(os.getenv("API_WORKERS", "1"))
+WORKERS = int(os.getenv("API_WORKERS", str(max(2, os.cpu_count() or 1))))
+METRICS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/scene_plus_metrics")
+
+
+class UvloopWorker(UvicornWorker):
+    """Uvicorn worker pinned to the uvloop event loop and httptools parser."""
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauge samples from the shared metrics."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class GunicornServer(BaseApplication):
+    """Pre-fork gunicorn server running uvicorn workers."""
+
+    def __init__(self, app_uri: str, options: dict):
+        """Initialize with the app import path and gunicorn options."""
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        """Apply server options to the gunicorn config."""
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        """Import the ASGI application in the worker."""
+        from gunicorn.util import import_app
+        return import_app(self.app_uri)
+
 
 if __name__ == "__main__":
-    # Run the server
-    uvicorn.run(
-        "endpoints:app",
-        host=HOST,
-        port=PORT,
-        reload=DEBUG,
-        workers=WORKERS,
-        log_level="info" if DEBUG else "warning"
-    ) 
\ No newline at end of file
+    # Workers size their connection pools from this
+    os.environ["API_WORKERS"] = str(WORKERS)
+
+    if DEBUG:
+        # Single reloading process for development
+        uvicorn.run(
+            "endpoints:app",
+            host=HOST,
+            port=PORT,
+            reload=True,
+            loop="uvloop",
+            http="httptools",
+            log_level="info"
+        )
+    else:
+        # Workers write prometheus samples to files here so scrapes see all of them;
+        # must be set before any worker imports prometheus_client
+        metrics_dir = Path(METRICS_DIR)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        for stale in metrics_dir.glob("*.db"):
+            stale.unlink()
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = METRICS_DIR
+        
+        GunicornServer("endpoints:app", {
+            "bind": f"{HOST}:{PORT}",
+            "workers": WORKERS,
+            "worker_class": UvloopWorker,
+            "loglevel": "warning",
+            "child_exit": child_exit
+        }).run()
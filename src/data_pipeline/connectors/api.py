@@ -1,9 +1,13 @@
 """
 API connector for Scene+ and partner data sources.
 """
-from typing import Any, Dict, Generator, Optional
+import asyncio
+from collections import deque
+from typing import Any, Dict, Generator, List, Optional
 import aiohttp
+import orjson
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime, timedelta
 
 from .base import BaseConnector, DataSourceConfig
@@ -16,6 +20,7 @@ class APIConfig(DataSourceConfig):
     api_secret: Optional[str]
     endpoints: Dict[str, str]
     headers: Optional[Dict[str, str]] = None
+    prefetch_pages: int = 8
 
     class Config:
         """Pydantic config."""
@@ -54,46 +59,92 @@ class APIConnector(BaseConnector):
         size = batch_size or self.batch_size
         endpoint = self.config.endpoints.get("transactions", "")
         
+        now = datetime.now()
         params = {
             "limit": size,
-            "from_date": (datetime.now() - timedelta(days=7)).isoformat(),
-            "to_date": datetime.now().isoformat()
+            "from_date": (now - timedelta(days=7)).isoformat(),
+            "to_date": now.isoformat()
         }
         
         try:
             async with self.session.get(endpoint, params=params) as response:
                 response.raise_for_status()
-                data = await response.json()
-                return pd.DataFrame(data.get("transactions", []))
+                data = orjson.loads(await response.read())
+                return self._to_frame(data.get("transactions", []))
         except aiohttp.ClientError as e:
             raise APIFetchError(f"Failed to fetch data from API: {str(e)}")
 
     async def stream_data(self) -> Generator[pd.DataFrame, None, None]:
-        """Stream data from the API in batches."""
+        """Stream data from the API in batches.
+
+        Keeps up to ``prefetch_pages`` page requests in flight and yields
+        pages in order, stopping at the first empty page.
+        """
         endpoint = self.config.endpoints.get("transactions", "")
-        page = 1
         
-        while True:
-            params = {
+        # One window for the whole stream so pages don't shift underneath us
+        now = datetime.now()
+        from_date = (now - timedelta(days=7)).isoformat()
+        to_date = now.isoformat()
+        
+        def page_params(page: int) -> Dict[str, Any]:
+            return {
                 "limit": self.batch_size,
                 "page": page,
-                "from_date": (datetime.now() - timedelta(days=7)).isoformat(),
-                "to_date": datetime.now().isoformat()
+                "from_date": from_date,
+                "to_date": to_date
             }
-            
-            try:
-                async with self.session.get(endpoint, params=params) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    transactions = data.get("transactions", [])
-                    
-                    if not transactions:
-                        break
-                        
-                    yield pd.DataFrame(transactions)
-                    page += 1
-            except aiohttp.ClientError as e:
-                raise APIFetchError(f"Failed to stream data from API: {str(e)}")
+        
+        window = deque(
+            asyncio.create_task(self._fetch_page(endpoint, page_params(page)))
+            for page in range(1, self.config.prefetch_pages + 1)
+        )
+        next_page = self.config.prefetch_pages + 1
+        
+        try:
+            while window:
+                transactions = await window.popleft()
+                
+                if not transactions:
+                    break
+                
+                window.append(
+                    asyncio.create_task(self._fetch_page(endpoint, page_params(next_page)))
+                )
+                next_page += 1
+                yield self._to_frame(transactions)
+        except aiohttp.ClientError as e:
+            raise APIFetchError(f"Failed to stream data from API: {str(e)}")
+        finally:
+            for task in window:
+                task.cancel()
+            await asyncio.gather(*window, return_exceptions=True)
+
+    async def _fetch_page(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fetch a single page of transactions."""
+        async with self.session.get(endpoint, params=params) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+            return data.get("transactions", [])
+
+    def _to_frame(self, transactions: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Build a DataFrame from transaction records via a columnar Arrow batch.
+
+        The struct type is inferred over every record, so optional fields
+        missing from the first record still get a column (null where absent).
+        Columns keep first-seen key order, as with pd.DataFrame(records);
+        Arrow's inferred struct fields are sorted by name.
+        """
+        if not transactions:
+            return pd.DataFrame()
+        columns = list(dict.fromkeys(key for record in transactions for key in record))
+        try:
+            df = pa.RecordBatch.from_struct_array(pa.array(transactions)).to_pandas()[columns]
+        except pa.ArrowException as e:
+            raise APIFetchError(f"Failed to convert API records: {str(e)}")
+        if self.config.dtypes and not df.empty:
+            df = df.astype(self.config.dtypes, copy=False)
+        return df
 
 
 class APIFetchError(Exception):
@@ -14,7 +14,8 @@ class DataSourceConfig(BaseModel):
     type: str
     batch_size: int = 1000
     timeout: int = 30
-    connection_params: Dict[str, Any]
+    connection_params: Dict[str, Any] = {}
+    dtypes: Optional[Dict[str, str]] = None  # column -> dtype, skips inference
 
 
 class BaseConnector(ABC):
@@ -1,26 +1,43 @@
 """
 Factory class for creating and managing data source connectors.
 """
-from typing import Dict, Type
+from enum import StrEnum
+from functools import cache
+from typing import Dict, Tuple, Type
 
 from .base import BaseConnector, DataSourceConfig
 from .postgres import PostgresConnector, PostgresConfig
 from .api import APIConnector, APIConfig
 
 
+SourceType = StrEnum("SourceType", "postgres api")
+
+
 class ConnectorFactory:
     """Factory class for creating data source connectors."""
 
     _connector_registry: Dict[str, Type[BaseConnector]] = {
-        "postgres": PostgresConnector,
-        "api": APIConnector
+        SourceType.postgres: PostgresConnector,
+        SourceType.api: APIConnector
     }
 
     _config_registry: Dict[str, Type[DataSourceConfig]] = {
-        "postgres": PostgresConfig,
-        "api": APIConfig
+        SourceType.postgres: PostgresConfig,
+        SourceType.api: APIConfig
     }
 
+    @staticmethod
+    @cache
+    def _resolve(source_type: str) -> Tuple[Type[BaseConnector], Type[DataSourceConfig]]:
+        """Look up the connector and config classes for a source type."""
+        if source_type not in ConnectorFactory._connector_registry:
+            raise ValueError(f"Unsupported source type: {source_type}")
+
+        return (
+            ConnectorFactory._connector_registry[source_type],
+            ConnectorFactory._config_registry[source_type]
+        )
+
     @classmethod
     def create_connector(cls, source_type: str, config_data: Dict) -> BaseConnector:
         """
@@ -36,11 +53,7 @@ class ConnectorFactory:
         Raises:
             ValueError: If source_type is not supported
         """
-        if source_type not in cls._connector_registry:
-            raise ValueError(f"Unsupported source type: {source_type}")
-
-        connector_class = cls._connector_registry[source_type]
-        config_class = cls._config_registry[source_type]
+        connector_class, config_class = cls._resolve(source_type)
         
         # Create configuration instance
         config = config_class(**config_data)
@@ -64,4 +77,5 @@ class ConnectorFactory:
             config_class: Configuration class for the connector
         """
         cls._connector_registry[source_type] = connector_class
-        cls._config_registry[source_type] = config_class 
\ No newline at end of file
+        cls._config_registry[source_type] = config_class
+        cls._resolve.cache_clear() 
\ No newline at end of file
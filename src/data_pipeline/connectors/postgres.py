@@ -1,15 +1,43 @@
 """
 PostgreSQL connector for retail transaction data.
 """
+import io
 from typing import Any, Dict, Generator, Optional
 
+import asyncpg
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+import pyarrow as pa
+from pyarrow import csv
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 
 from .base import BaseConnector, DataSourceConfig
 
+# Arrow column types by PostgreSQL result type. Types not listed (text, uuid,
+# json, ...) are read as strings, untouched by inference.
+_PG_ARROW_TYPES = {
+    "bool": pa.bool_(),
+    "int2": pa.int16(),
+    "int4": pa.int32(),
+    "int8": pa.int64(),
+    "float4": pa.float32(),
+    "float8": pa.float64(),
+    "numeric": pa.float64(),
+    "date": pa.timestamp("us"),
+    "timestamp": pa.timestamp("us"),
+    "timestamptz": pa.timestamp("us", tz="UTC")
+}
+
+# Nullable pandas dtypes for integer and boolean columns, which keep NULLs
+# without falling back to float or object
+_PANDAS_DTYPES = {
+    pa.bool_(): pd.BooleanDtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype()
+}
+
 
 class PostgresConfig(DataSourceConfig):
     """PostgreSQL specific configuration."""
@@ -19,6 +47,9 @@ class PostgresConfig(DataSourceConfig):
     user: str
     password: str
     schema: str = "public"
+    pool_size: int = 20
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
 
     class Config:
         """Pydantic config."""
@@ -31,60 +62,173 @@ class PostgresConnector(BaseConnector):
     def __init__(self, config: PostgresConfig):
         """Initialize PostgreSQL connector."""
         super().__init__(config)
-        self.engine: Optional[Engine] = None
+        self.engine: Optional[AsyncEngine] = None
+        # Result column types per query text, resolved once by preparing it
+        self._result_types: Dict[str, Dict[str, pa.DataType]] = {}
         self._connection_string = (
-            f"postgresql://{config.user}:{config.password}@"
+            f"postgresql+asyncpg://{config.user}:{config.password}@"
             f"{config.host}:{config.port}/{config.database}"
         )
 
     async def connect(self) -> None:
-        """Establish connection to PostgreSQL database."""
+        """Create the pooled engine and check the database is reachable."""
+        if self.engine is not None:
+            return
         try:
-            self.engine = create_engine(self._connection_string)
-            self._connection = self.engine.connect()
-        except SQLAlchemyError as e:
+            engine = create_async_engine(
+                self._connection_string,
+                pool_size=self.config.pool_size,
+                max_overflow=self.config.max_overflow,
+                pool_pre_ping=self.config.pool_pre_ping
+            )
+            # The engine connects lazily; open one pooled connection now so
+            # bad hosts or credentials fail here rather than on first query
+            try:
+                async with engine.connect() as connection:
+                    await connection.exec_driver_sql("SELECT 1")
+            except BaseException:
+                await engine.dispose()
+                raise
+            self.engine = engine
+        except (SQLAlchemyError, OSError, asyncpg.PostgresError) as e:
             raise ConnectionError(f"Failed to connect to PostgreSQL: {str(e)}")
 
     async def disconnect(self) -> None:
-        """Close the PostgreSQL connection."""
-        if self._connection:
-            self._connection.close()
+        """Dispose of the engine and its connection pool."""
         if self.engine:
-            self.engine.dispose()
+            await self.engine.dispose()
+            self.engine = None
 
     async def fetch_batch(self, batch_size: Optional[int] = None) -> pd.DataFrame:
         """Fetch a batch of data from PostgreSQL."""
         size = batch_size or self.batch_size
         query = f"""
             SELECT *
-            FROM {self.config.schema}.transactions
+            FROM {self._table}
             ORDER BY transaction_timestamp DESC
-            LIMIT {size}
+            LIMIT $1
         """
         try:
-            return pd.read_sql(query, self._connection)
-        except SQLAlchemyError as e:
+            async with self.engine.connect() as connection:
+                return await self._copy_frame(connection, query, size)
+        except (SQLAlchemyError, asyncpg.PostgresError, pa.ArrowException) as e:
             raise DataFetchError(f"Failed to fetch data from PostgreSQL: {str(e)}")
 
     async def stream_data(self) -> Generator[pd.DataFrame, None, None]:
-        """Stream data from PostgreSQL in batches."""
-        offset = 0
-        while True:
-            query = f"""
-                SELECT *
-                FROM {self.config.schema}.transactions
-                ORDER BY transaction_timestamp DESC
-                LIMIT {self.batch_size}
-                OFFSET {offset}
-            """
-            try:
-                df = pd.read_sql(query, self._connection)
+        """
+        Stream data from PostgreSQL in batches.
+
+        Uses keyset pagination on (transaction_timestamp, transaction_id) so
+        each batch is an index seek past the last row seen rather than an
+        OFFSET scan over every preceding row.
+        """
+        first_page = f"""
+            SELECT *
+            FROM {self._table}
+            ORDER BY transaction_timestamp DESC, transaction_id DESC
+            LIMIT $1
+        """
+        next_page = f"""
+            SELECT *
+            FROM {self._table}
+            WHERE (transaction_timestamp, transaction_id) < ($2, $3)
+            ORDER BY transaction_timestamp DESC, transaction_id DESC
+            LIMIT $1
+        """
+        query, args = first_page, (self.batch_size,)
+        async with self.engine.connect() as connection:
+            while True:
+                try:
+                    df = await self._copy_frame(connection, query, *args)
+                except (SQLAlchemyError, asyncpg.PostgresError, pa.ArrowException) as e:
+                    raise DataFetchError(f"Failed to stream data from PostgreSQL: {str(e)}")
                 if df.empty:
                     break
                 yield df
-                offset += self.batch_size
-            except SQLAlchemyError as e:
-                raise DataFetchError(f"Failed to stream data from PostgreSQL: {str(e)}")
+                last = df.iloc[-1]
+                query = next_page
+                args = (
+                    self.batch_size,
+                    self._to_python(last["transaction_timestamp"]),
+                    self._to_python(last["transaction_id"])
+                )
+
+    @property
+    def _table(self) -> str:
+        """Quoted, schema-qualified name of the transactions table."""
+        preparer = self.engine.dialect.identifier_preparer
+        return f"{preparer.quote_schema(self.config.schema)}.transactions"
+
+    async def _copy_frame(self, connection: AsyncConnection, query: str, *args: Any) -> pd.DataFrame:
+        """
+        Run a query through COPY ... TO STDOUT and parse the result.
+
+        Rows are streamed as CSV by the server and parsed by Arrow's
+        multithreaded CSV reader, skipping per-row Python object construction
+        in the driver. Column types come from the query's result types rather
+        than CSV inference, with ``config.dtypes`` applied on top where set.
+
+        Args:
+            connection: Pooled connection to run the query on
+            query: SELECT statement using $n placeholders
+            *args: Positional query arguments
+
+        Returns:
+            DataFrame: Query result
+        """
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        column_types = await self._column_types(driver_connection, query)
+
+        buffer = io.BytesIO()
+        await driver_connection.copy_from_query(
+            query, *args, output=buffer, format="csv", header=True
+        )
+        buffer.seek(0)
+        # COPY writes NULL as an unquoted empty field and booleans as t/f
+        table = csv.read_csv(
+            buffer,
+            convert_options=csv.ConvertOptions(
+                column_types=column_types,
+                true_values=["t"],
+                false_values=["f"],
+                null_values=[""],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False
+            )
+        )
+        df = table.to_pandas(types_mapper=_PANDAS_DTYPES.get)
+        if self.config.dtypes and not df.empty:
+            df = df.astype(self.config.dtypes, copy=False)
+        return df
+
+    async def _column_types(self, driver_connection: Any, query: str) -> Dict[str, pa.DataType]:
+        """
+        Arrow column types for a query's result.
+
+        Args:
+            driver_connection: asyncpg connection to prepare the query on
+            query: SELECT statement using $n placeholders
+
+        Returns:
+            Dict: Arrow type per result column
+        """
+        types = self._result_types.get(query)
+        if types is None:
+            statement = await driver_connection.prepare(query)
+            types = self._result_types[query] = {
+                attribute.name: _PG_ARROW_TYPES.get(attribute.type.name, pa.string())
+                for attribute in statement.get_attributes()
+            }
+        return types
+
+    @staticmethod
+    def _to_python(value: Any) -> Any:
+        """Convert a pandas/numpy scalar into a type asyncpg can bind."""
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
 
 
 class DataFetchError(Exception):
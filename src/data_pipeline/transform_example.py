@@ -2,8 +2,9 @@
 Example usage of the Scene+ data transformation pipeline.
 """
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from typing import Dict, Any
+from typing import Any, Dict, Tuple
 
 from connectors.factory import ConnectorFactory
 from transformers.retail import RetailTransformer
@@ -11,7 +12,70 @@ from transformers.scene import SceneTransformer
 from transformers.partner import PartnerTransformer
 
 
-async def process_retail_data(connector: Any, transformer: RetailTransformer) -> Dict[str, Any]:
+def run_transform(transformer: Any, raw_data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Transform a batch in a worker process, returning the data and its error report."""
+    transformed_data = transformer.transform(raw_data)
+    return transformed_data, transformer.get_error_report()
+
+
+async def transform_in_executor(
+    executor: ProcessPoolExecutor,
+    transformer: Any,
+    raw_data: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Run a CPU-bound transform off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, run_transform, transformer, raw_data)
+
+
+async def transform_stream(
+    conn: Any,
+    transformer: Any,
+    executor: ProcessPoolExecutor
+) -> Tuple[int, pd.DataFrame, pd.DataFrame]:
+    """
+    Transform every batch a connector streams, fetching ahead of the transform.
+    
+    A producer keeps up to two fetched batches queued while the consumer
+    transforms the current one, overlapping network I/O with validation.
+    
+    Args:
+        conn: Connected data source connector
+        transformer: Transformer to apply to each batch
+        executor: Process pool to run transforms in
+        
+    Returns:
+        Tuple[int, DataFrame, DataFrame]: Raw record count, transformed data and errors
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    
+    async def producer() -> None:
+        try:
+            async for batch in conn.stream_data():
+                await queue.put(batch)
+        finally:
+            await queue.put(None)
+    
+    async def consumer() -> Tuple[int, pd.DataFrame, pd.DataFrame]:
+        raw_count, transformed, errors = 0, [], []
+        while (batch := await queue.get()) is not None:
+            raw_count += len(batch)
+            batch_data, batch_errors = await transform_in_executor(executor, transformer, batch)
+            transformed.append(batch_data)
+            errors.append(batch_errors)
+        if not transformed:
+            return 0, pd.DataFrame(), transformer.get_error_report()
+        return raw_count, pd.concat(transformed, ignore_index=True), pd.concat(errors, ignore_index=True)
+    
+    _, result = await asyncio.gather(producer(), consumer())
+    return result
+
+
+async def process_retail_data(
+    connector: Any,
+    transformer: RetailTransformer,
+    executor: ProcessPoolExecutor
+) -> Dict[str, Any]:
     """Process retail transaction data."""
     results = {
         'source': 'retail',
@@ -23,23 +87,24 @@ async def process_retail_data(connector: Any, transformer: RetailTransformer) ->
     }
     
     async with connector as conn:
-        # Fetch data
-        raw_data = await conn.fetch_batch(batch_size=1000)
-        results['raw_record_count'] = len(raw_data)
-        
-        # Transform data
-        transformed_data = transformer.transform(raw_data)
+        # Fetch and transform data, prefetching the next batch
+        raw_count, transformed_data, errors = await transform_stream(conn, transformer, executor)
+        results['raw_record_count'] = raw_count
         results['valid_record_count'] = len(transformed_data)
-        results['error_count'] = len(transformer.error_records)
+        results['error_count'] = len(errors)
         
         # Store samples
         results['sample_data'] = transformed_data.head() if not transformed_data.empty else None
-        results['error_samples'] = transformer.get_error_report().head() if transformer.error_records else None
+        results['error_samples'] = errors.head() if not errors.empty else None
     
     return results
 
 
-async def process_scene_data(connector: Any, transformer: SceneTransformer) -> Dict[str, Any]:
+async def process_scene_data(
+    connector: Any,
+    transformer: SceneTransformer,
+    executor: ProcessPoolExecutor
+) -> Dict[str, Any]:
     """Process Scene+ transaction data."""
     results = {
         'source': 'scene_plus',
@@ -52,14 +117,11 @@ async def process_scene_data(connector: Any, transformer: SceneTransformer) -> D
     }
     
     async with connector as conn:
-        # Fetch data
-        raw_data = await conn.fetch_batch(batch_size=1000)
-        results['raw_record_count'] = len(raw_data)
-        
-        # Transform data
-        transformed_data = transformer.transform(raw_data)
+        # Fetch and transform data, prefetching the next batch
+        raw_count, transformed_data, errors = await transform_stream(conn, transformer, executor)
+        results['raw_record_count'] = raw_count
         results['valid_record_count'] = len(transformed_data)
-        results['error_count'] = len(transformer.error_records)
+        results['error_count'] = len(errors)
         
         # Calculate member metrics
         if not transformed_data.empty:
@@ -67,12 +129,16 @@ async def process_scene_data(connector: Any, transformer: SceneTransformer) -> D
         
         # Store samples
         results['sample_data'] = transformed_data.head() if not transformed_data.empty else None
-        results['error_samples'] = transformer.get_error_report().head() if transformer.error_records else None
+        results['error_samples'] = errors.head() if not errors.empty else None
     
     return results
 
 
-async def process_partner_data(connector: Any, transformer: PartnerTransformer) -> Dict[str, Any]:
+async def process_partner_data(
+    connector: Any,
+    transformer: PartnerTransformer,
+    executor: ProcessPoolExecutor
+) -> Dict[str, Any]:
     """Process partner transaction data."""
     results = {
         'source': 'partner',
@@ -86,14 +152,11 @@ async def process_partner_data(connector: Any, transformer: PartnerTransformer)
     }
     
     async with connector as conn:
-        # Fetch data
-        raw_data = await conn.fetch_batch(batch_size=1000)
-        results['raw_record_count'] = len(raw_data)
-        
-        # Transform data
-        transformed_data = transformer.transform(raw_data)
+        # Fetch and transform data, prefetching the next batch
+        raw_count, transformed_data, errors = await transform_stream(conn, transformer, executor)
+        results['raw_record_count'] = raw_count
         results['valid_record_count'] = len(transformed_data)
-        results['error_count'] = len(transformer.error_records)
+        results['error_count'] = len(errors)
         
         # Calculate metrics
         if not transformed_data.empty:
@@ -102,7 +165,7 @@ async def process_partner_data(connector: Any, transformer: PartnerTransformer)
         
         # Store samples
         results['sample_data'] = transformed_data.head() if not transformed_data.empty else None
-        results['error_samples'] = transformer.get_error_report().head() if transformer.error_records else None
+        results['error_samples'] = errors.head() if not errors.empty else None
     
     return results
 
@@ -147,12 +210,13 @@ async def main():
             }
         })
         
-        # Process data from all sources
-        results = await asyncio.gather(
-            process_retail_data(retail_connector, retail_transformer),
-            process_scene_data(scene_connector, scene_transformer),
-            process_partner_data(partner_connector, partner_transformer)
-        )
+        # Process data from all sources, one worker process per transform
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            results = await asyncio.gather(
+                process_retail_data(retail_connector, retail_transformer, executor),
+                process_scene_data(scene_connector, scene_transformer, executor),
+                process_partner_data(partner_connector, partner_transformer, executor)
+            )
         
         # Print results
         for source_results in results:
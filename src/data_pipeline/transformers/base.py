@@ -2,12 +2,17 @@
 Base transformer class for data standardization.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin
 
+import numpy as np
 import pandas as pd
-from pydantic import BaseModel, ValidationError
+import pydantic
+from pydantic import BaseModel
 
-from ..validation.schemas import RetailTransaction, SceneTransaction, PartnerTransaction
+from ..validation.schemas import (
+    RetailTransaction, SceneTransaction, PartnerTransaction, get_list_adapter
+)
 
 
 class TransformerError(Exception):
@@ -25,21 +30,45 @@ class TransformationError(TransformerError):
     pass
 
 
+def _unwrap_optional(annotation: Any) -> Tuple[Any, bool]:
+    """Field annotation without Optional, and whether it allowed None."""
+    if get_origin(annotation) is Union and type(None) in get_args(annotation):
+        return next(a for a in get_args(annotation) if a is not type(None)), True
+    return annotation, False
+
+
 class BaseTransformer(ABC):
     """Abstract base class for data transformers."""
 
+    # Rows transformed when only a sample is wanted
+    SAMPLE_SIZE = 20
+
     def __init__(self, schema: BaseModel):
         """Initialize transformer with validation schema."""
         self.schema = schema
-        self.error_records: List[Dict[str, Any]] = []
+        self._err_records: List[Dict[str, Any]] = []
+        self._err_msgs: List[str] = []
+        self._list_adapter = get_list_adapter(schema)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Drop the compiled validator so transformers can be sent to worker processes."""
+        state = self.__dict__.copy()
+        del state['_list_adapter']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore state, taking the validator from the worker's adapter cache."""
+        self.__dict__.update(state)
+        self._list_adapter = get_list_adapter(self.schema)
 
     @abstractmethod
-    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, data: pd.DataFrame, sample_only: bool = False) -> pd.DataFrame:
         """
         Transform data into standardized format.
         
         Args:
             data: Input DataFrame to transform
+            sample_only: Only transform the first SAMPLE_SIZE rows
             
         Returns:
             DataFrame: Transformed and validated data
@@ -60,15 +89,285 @@ class BaseTransformer(ABC):
             Optional[Dict]: Validated record or None if validation fails
         """
         try:
-            validated = self.schema(**record)
-            return validated.dict()
-        except ValidationError as e:
-            self.error_records.append({
-                'record': record,
-                'error': str(e)
-            })
+            validated = self.schema.model_validate(record)
+            return validated.model_dump()
+        except pydantic.ValidationError as e:
+            self._err_records.append(record)
+            self._err_msgs.append(str(e))
             return None
 
+    def validate_batch(self, records: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Validate a list of records against the schema in a single call.
+        
+        Args:
+            records: List of record dictionaries
+            
+        Returns:
+            List[Optional[Dict]]: Validated records, None where validation failed
+        """
+        try:
+            return self._list_adapter.dump_python(self._list_adapter.validate_python(records))
+        except pydantic.ValidationError as e:
+            failures: Dict[int, List[str]] = {}
+            for error in e.errors():
+                field = '.'.join(str(part) for part in error['loc'][1:])
+                failures.setdefault(error['loc'][0], []).append(f"{field}: {error['msg']}")
+        
+        for index, messages in failures.items():
+            self._err_records.append(records[index])
+            self._err_msgs.append('; '.join(messages))
+        
+        passed = [i for i in range(len(records)) if i not in failures]
+        validated = iter(self._list_adapter.dump_python(
+            self._list_adapter.validate_python([records[i] for i in passed])
+        ))
+        return [None if i in failures else next(validated) for i in range(len(records))]
+
+    def validate_frame(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Validate a batch column-wise against the schema.
+        
+        Rows passing the vectorized checks, which mirror the schema's field
+        types and constraints, are accepted as-is; only the rows they flag are
+        run through the Pydantic schema, which either coerces them or records
+        why they failed. Either way the result has the same column dtypes.
+        
+        Args:
+            df: DataFrame to validate
+            
+        Returns:
+            Tuple[DataFrame, DataFrame]: Valid records and error report
+        """
+        fields = list(self.schema.model_fields)
+        valid_mask = self._valid_mask(df)
+        if valid_mask.all():
+            # Clean batch: keep the existing column arrays rather than rebuilding
+            valid = df.reindex(columns=fields, copy=False)
+            valid = valid.set_axis(pd.RangeIndex(len(valid)), copy=False)
+            return self._normalize(valid, df), self.get_error_report()
+        
+        valid = df.loc[valid_mask].reindex(columns=fields)
+        suspect = df.loc[~valid_mask]
+        if not suspect.empty:
+            # Only schema fields are handed to Pydantic, which would drop the rest
+            records = self._records(suspect[[name for name in fields if name in suspect.columns]])
+            recovered = {
+                index: validated
+                for index, validated in zip(suspect.index, self.validate_batch(records))
+                if validated
+            }
+            if recovered:
+                valid = pd.concat([
+                    valid.astype(object),
+                    pd.DataFrame.from_dict(recovered, orient='index', columns=fields)
+                ]).sort_index()
+        
+        return self._normalize(valid.reset_index(drop=True), df), self.get_error_report()
+
+    def _normalize(self, valid: pd.DataFrame, source: pd.DataFrame) -> pd.DataFrame:
+        """
+        Give validated rows the same column dtypes whichever path they took.
+        
+        Datetimes become UTC datetime64 and numbers float64 or int64; string
+        fields are categorical if their input column was, otherwise objects
+        with None for missing values.
+        
+        Args:
+            valid: Validated rows, possibly mixing input and Pydantic values
+            source: Input frame the rows came from
+            
+        Returns:
+            DataFrame: Validated rows with normalized dtypes
+        """
+        columns = {}
+        for name, field in self.schema.model_fields.items():
+            column = valid[name]
+            annotation, _ = _unwrap_optional(field.annotation)
+            if annotation is datetime:
+                column = pd.to_datetime(column, utc=True)
+            elif annotation is float:
+                column = column.astype(np.float64)
+            elif annotation is int and column.notna().all():
+                column = column.astype(np.int64)
+            elif name in source.columns and isinstance(source[name].dtype, pd.CategoricalDtype):
+                categories = source[name].cat.categories
+                extra = pd.Index(column.dropna().unique()).difference(categories)
+                column = column.astype(pd.CategoricalDtype(categories.append(extra)))
+            else:
+                column = column.astype(object).where(column.notna(), None)
+            columns[name] = column
+        return pd.DataFrame(columns, index=valid.index, copy=False)
+
+    @staticmethod
+    def _standardize(
+        data: pd.DataFrame,
+        columns: Dict[str, str],
+        converters: Dict[str, Callable[[pd.Series], pd.Series]]
+    ) -> pd.DataFrame:
+        """
+        Rename and convert columns in a single column-wise pass.
+        
+        Builds the output frame once from the converted columns instead of
+        copying the whole frame on rename and again on each assignment.
+        
+        Args:
+            data: Raw input DataFrame
+            columns: Mapping of source to standard column names
+            converters: Conversions keyed by standard column name
+            
+        Returns:
+            DataFrame: Standardized data
+            
+        Raises:
+            TransformationError: If a column to convert is missing
+        """
+        standardized = {columns.get(name, name): column for name, column in data.items()}
+        missing = [name for name in converters if name not in standardized]
+        if missing:
+            raise TransformationError(f"Missing columns: {missing}")
+        
+        for name, convert in converters.items():
+            standardized[name] = convert(standardized[name])
+        return pd.DataFrame(standardized, copy=False)
+
+    @staticmethod
+    def _parse_timestamps(column: pd.Series) -> pd.Series:
+        """Parse ISO 8601 timestamps to tz-aware UTC."""
+        return pd.to_datetime(column, format='ISO8601', cache=True, utc=True)
+
+    @staticmethod
+    def _lowercase_category(column: pd.Series) -> pd.Series:
+        """
+        Lowercase a low-cardinality string column as a categorical.
+        
+        Only the unique categories are lowercased, not every row.
+        
+        Args:
+            column: String column to normalize
+            
+        Returns:
+            Series: Categorical column with lowercased categories
+        """
+        column = column.astype('category')
+        lowered = column.cat.categories.str.lower()
+        if lowered.is_unique:
+            return column.cat.rename_categories(lowered)
+        return column.map(dict(zip(column.cat.categories, lowered))).astype('category')
+
+    @staticmethod
+    def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Build record dicts by zipping column lists rather than per-cell lookups."""
+        columns = {name: df[name].tolist() for name in df.columns}
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def _valid_mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Flag rows the schema accepts unchanged, from its field types and constraints.
+        
+        A row is only flagged valid when each value already has the field's
+        type and meets its constraints (numeric bounds, lengths, literal
+        values); anything else, including field types not checked here, is
+        left to Pydantic.
+        
+        Args:
+            df: DataFrame to check
+            
+        Returns:
+            Series: Boolean mask of rows known to be valid
+        """
+        mask = pd.Series(True, index=df.index)
+        for name, field in self.schema.model_fields.items():
+            if name not in df.columns:
+                if field.is_required():
+                    return mask & False
+                continue
+            
+            column = df[name]
+            annotation, nullable = _unwrap_optional(field.annotation)
+            ok = self._type_mask(column, annotation)
+            if ok is None:
+                return mask & False
+            
+            for constraint in field.metadata:
+                ok &= self._constraint_mask(column, constraint)
+            
+            mask &= (ok | column.isna()) if nullable else ok
+        
+        return mask & self._rules_mask(df)
+
+    @staticmethod
+    def _type_mask(column: pd.Series, annotation: Any) -> Optional[pd.Series]:
+        """
+        Rows of a column already holding the annotated type.
+        
+        Args:
+            column: Column to check
+            annotation: Field type, without Optional
+            
+        Returns:
+            Optional[Series]: Boolean mask, or None when the whole column has
+            to go through Pydantic
+        """
+        dtype = column.dtype
+        if get_origin(annotation) is Literal:
+            return column.isin(get_args(annotation))
+        if annotation is str:
+            if isinstance(dtype, pd.CategoricalDtype):
+                return column.isin([c for c in dtype.categories if isinstance(c, str)])
+            return column.map(type).eq(str)
+        if annotation is bool:
+            return column.notna() if pd.api.types.is_bool_dtype(dtype) else None
+        if annotation in (int, float):
+            numeric = (
+                pd.api.types.is_integer_dtype(dtype) if annotation is int
+                else pd.api.types.is_numeric_dtype(dtype)
+            )
+            if not numeric or pd.api.types.is_bool_dtype(dtype):
+                return None
+            return column.notna()
+        if annotation is datetime:
+            return column.notna() if pd.api.types.is_datetime64_any_dtype(dtype) else None
+        if get_origin(annotation) is list:
+            # Elements are checked by _rules_mask where the schema needs it
+            return column.map(lambda value: isinstance(value, list)).astype(bool)
+        return None
+
+    @staticmethod
+    def _constraint_mask(column: pd.Series, constraint: Any) -> pd.Series:
+        """Rows of a type-checked column meeting one field constraint."""
+        ok = pd.Series(True, index=column.index)
+        for attribute, compare in (('gt', 'gt'), ('ge', 'ge'), ('lt', 'lt'), ('le', 'le')):
+            bound = getattr(constraint, attribute, None)
+            if bound is not None:
+                ok &= getattr(column, compare)(bound)
+        min_length = getattr(constraint, 'min_length', None)
+        max_length = getattr(constraint, 'max_length', None)
+        if min_length is not None or max_length is not None:
+            lengths = column.map(len, na_action='ignore')
+            if min_length is not None:
+                ok &= lengths.ge(min_length)
+            if max_length is not None:
+                ok &= lengths.le(max_length)
+        return ok
+
+    def _rules_mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized checks for what _valid_mask cannot derive, e.g. nested models.
+        
+        Args:
+            df: DataFrame to check
+            
+        Returns:
+            Series: Boolean mask of rows passing the schema's validators
+        """
+        return pd.Series(True, index=df.index)
+
+    @property
+    def error_count(self) -> int:
+        """Number of records that failed validation."""
+        return len(self._err_msgs)
+
     def get_error_report(self) -> pd.DataFrame:
         """
         Get report of validation errors.
@@ -76,8 +375,9 @@ class BaseTransformer(ABC):
         Returns:
             DataFrame: Error records with their validation messages
         """
-        return pd.DataFrame(self.error_records)
+        return pd.DataFrame({'record': self._err_records, 'error': self._err_msgs}, copy=False)
 
     def clear_errors(self) -> None:
         """Clear error records."""
-        self.error_records = [] 
\ No newline at end of file
+        self._err_records = []
+        self._err_msgs = [] 
\ No newline at end of file
@@ -15,12 +15,13 @@ class PartnerTransformer(BaseTransformer):
         """Initialize partner transformer."""
         super().__init__(PartnerTransaction)
 
-    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, data: pd.DataFrame, sample_only: bool = False) -> pd.DataFrame:
         """
         Transform partner transaction data into standardized format.
         
         Args:
             data: Raw partner transaction DataFrame
+            sample_only: Only transform the first SAMPLE_SIZE rows
             
         Returns:
             DataFrame: Transformed and validated data
@@ -32,8 +33,12 @@ class PartnerTransformer(BaseTransformer):
             # Reset error records
             self.clear_errors()
             
-            # Standardize column names
-            data = data.rename(columns={
+            # Skip the rest of the batch when only a sample is displayed
+            if sample_only:
+                data = data.head(self.SAMPLE_SIZE)
+            
+            # Standardize column names and types in one pass
+            data = self._standardize(data, {
                 'partner_transaction_id': 'transaction_id',
                 'partner': 'partner_id',
                 'scene_member_id': 'member_id',
@@ -42,32 +47,20 @@ class PartnerTransformer(BaseTransformer):
                 'transaction_amount': 'amount',
                 'points_value': 'points',
                 'transaction_location': 'location'
+            }, {
+                'transaction_timestamp': self._parse_timestamps,
+                'amount': lambda column: column.astype(float),
+                'points': lambda column: column.astype(float),
+                'partner_id': self._lowercase_category
             })
             
-            # Ensure datetime format
-            data['transaction_timestamp'] = pd.to_datetime(data['transaction_timestamp'])
-            
-            # Convert numeric fields
-            data['amount'] = data['amount'].astype(float)
-            data['points'] = data['points'].astype(float)
-            
-            # Standardize partner IDs
-            data['partner_id'] = data['partner_id'].str.lower()
-            
-            # Handle missing locations
-            data['location'] = data['location'].fillna(None)
+            # Validate the batch
+            validated, _ = self.validate_frame(data)
             
-            # Validate each record
-            validated_records = []
-            for record in data.to_dict('records'):
-                validated = self.validate_record(record)
-                if validated:
-                    validated_records.append(validated)
-            
-            if not validated_records:
+            if validated.empty:
                 raise TransformationError("No valid records after transformation")
             
-            return pd.DataFrame(validated_records)
+            return validated
             
         except Exception as e:
             raise TransformationError(f"Failed to transform partner data: {str(e)}")
@@ -83,19 +76,24 @@ class PartnerTransformer(BaseTransformer):
             DataFrame: Aggregated activity metrics
         """
         try:
-            return data.groupby(['partner_id', 'member_id']).agg({
-                'amount': 'sum',
-                'points': 'sum',
-                'transaction_timestamp': 'max',
-                'transaction_id': 'count',
-                'location': lambda x: x.value_counts().index[0] if not x.isna().all() else None
-            }).rename(columns={
-                'amount': 'total_spend',
-                'points': 'total_points',
-                'transaction_timestamp': 'last_activity',
-                'transaction_id': 'transaction_count',
-                'location': 'most_frequent_location'
-            }).reset_index()
+            keys = ['partner_id', 'member_id']
+            activity = data.groupby(keys, sort=False, observed=True).agg(
+                total_spend=('amount', 'sum'),
+                total_points=('points', 'sum'),
+                last_activity=('transaction_timestamp', 'max'),
+                transaction_count=('transaction_id', 'count')
+            ).reset_index()
+            
+            # Most frequent location per group, from location counts
+            counts = data.groupby(
+                keys + ['location'], dropna=True, sort=False, observed=True
+            ).size().reset_index(name='n')
+            most_frequent = counts.loc[
+                counts.groupby(keys, sort=False, observed=True)['n'].idxmax(),
+                keys + ['location']
+            ].rename(columns={'location': 'most_frequent_location'})
+            
+            return activity.merge(most_frequent, on=keys, how='left')
         except Exception as e:
             raise TransformationError(f"Failed to aggregate partner activity: {str(e)}")
 
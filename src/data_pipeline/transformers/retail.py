@@ -2,6 +2,7 @@
 Transformer for retail transaction data.
 """
 from typing import Dict, Any
+import orjson
 import pandas as pd
 
 from .base import BaseTransformer, TransformationError
@@ -15,12 +16,13 @@ class RetailTransformer(BaseTransformer):
         """Initialize retail transformer."""
         super().__init__(RetailTransaction)
 
-    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, data: pd.DataFrame, sample_only: bool = False) -> pd.DataFrame:
         """
         Transform retail transaction data into standardized format.
         
         Args:
             data: Raw retail transaction DataFrame
+            sample_only: Only transform the first SAMPLE_SIZE rows
             
         Returns:
             DataFrame: Transformed and validated data
@@ -32,8 +34,12 @@ class RetailTransformer(BaseTransformer):
             # Reset error records
             self.clear_errors()
             
-            # Standardize column names
-            data = data.rename(columns={
+            # Skip the rest of the batch when only a sample is displayed
+            if sample_only:
+                data = data.head(self.SAMPLE_SIZE)
+            
+            # Standardize column names and types in one pass
+            data = self._standardize(data, {
                 'trans_id': 'transaction_id',
                 'store_number': 'store_id',
                 'cust_id': 'customer_id',
@@ -42,37 +48,69 @@ class RetailTransformer(BaseTransformer):
                 'retail_banner': 'banner',
                 'payment_type': 'payment_method',
                 'scene_points': 'points_earned'
+            }, {
+                'transaction_timestamp': self._parse_timestamps,
+                'total_amount': lambda column: column.astype(float),
+                'points_earned': lambda column: column.fillna(0).astype(float),
+                'banner': self._lowercase_category,
+                # Parse items if they arrive in string format
+                'items': lambda column: (
+                    self._parse_items_column(column) if column.dtype == 'object' else column
+                )
             })
             
-            # Ensure datetime format
-            data['transaction_timestamp'] = pd.to_datetime(data['transaction_timestamp'])
-            
-            # Convert amounts to float
-            data['total_amount'] = data['total_amount'].astype(float)
-            data['points_earned'] = data['points_earned'].fillna(0).astype(float)
-            
-            # Standardize banner names
-            data['banner'] = data['banner'].str.lower()
-            
-            # Process items column if it's in string format
-            if data['items'].dtype == 'object':
-                data['items'] = data['items'].apply(self._parse_items)
-            
-            # Validate each record
-            validated_records = []
-            for record in data.to_dict('records'):
-                validated = self.validate_record(record)
-                if validated:
-                    validated_records.append(validated)
+            # Validate the batch
+            validated, _ = self.validate_frame(data)
             
-            if not validated_records:
+            if validated.empty:
                 raise TransformationError("No valid records after transformation")
             
-            return pd.DataFrame(validated_records)
+            return validated
             
         except Exception as e:
             raise TransformationError(f"Failed to transform retail data: {str(e)}")
 
+    def _rules_mask(self, data: pd.DataFrame) -> pd.Series:
+        """Items must already be valid Item dicts."""
+        return data['items'].map(self._valid_items).astype(bool)
+
+    @staticmethod
+    def _valid_items(items: Any) -> bool:
+        """
+        Check items are exactly what the Item schema would dump.
+        
+        Items with extra keys or values Pydantic would coerce (e.g. an int
+        price) are left to the schema, so both paths return the same items.
+        """
+        return isinstance(items, list) and all(
+            isinstance(item, dict) and len(item) == 3
+            and type(item.get('sku')) is str
+            and type(item.get('quantity')) is int and item['quantity'] > 0
+            and type(item.get('price')) is float and item['price'] >= 0
+            for item in items
+        )
+
+    def _parse_items_column(self, items: pd.Series) -> pd.Series:
+        """
+        Parse a whole items column at once.
+        
+        A column of JSON lists goes straight through orjson; other formats are
+        parsed row by row without the per-call overhead of Series.apply.
+        
+        Args:
+            items: Column of item strings
+            
+        Returns:
+            Series: Column of item lists
+        """
+        values = items.tolist()
+        if all(isinstance(v, str) and v.startswith('[') and v.endswith(']') for v in values):
+            try:
+                return pd.Series(list(map(orjson.loads, values)), index=items.index)
+            except orjson.JSONDecodeError as e:
+                raise TransformationError(f"Failed to parse items: {str(e)}")
+        return pd.Series([self._parse_items(v) for v in values], index=items.index)
+
     def _parse_items(self, items_str: str) -> list:
         """
         Parse items string into list of dictionaries.
@@ -88,18 +126,14 @@ class RetailTransformer(BaseTransformer):
             if isinstance(items_str, str):
                 # If it's a string representation of a list
                 if items_str.startswith('[') and items_str.endswith(']'):
-                    import json
-                    return json.loads(items_str)
+                    return orjson.loads(items_str)
                 # If it's a pipe-separated format
-                items = []
-                for item_str in items_str.split('|'):
-                    sku, quantity, price = item_str.split(',')
-                    items.append({
-                        'sku': sku.strip(),
-                        'quantity': int(quantity),
-                        'price': float(price)
-                    })
-                return items
+                return [
+                    {'sku': sku.strip(), 'quantity': int(quantity), 'price': float(price)}
+                    for sku, quantity, price in (
+                        item_str.split(',') for item_str in items_str.split('|')
+                    )
+                ]
             # If it's already a list
             elif isinstance(items_str, list):
                 return items_str
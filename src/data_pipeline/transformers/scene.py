@@ -2,6 +2,7 @@
 Transformer for Scene+ transaction data.
 """
 from typing import Dict, Any
+import numpy as np
 import pandas as pd
 
 from .base import BaseTransformer, TransformationError
@@ -15,12 +16,13 @@ class SceneTransformer(BaseTransformer):
         """Initialize Scene+ transformer."""
         super().__init__(SceneTransaction)
 
-    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, data: pd.DataFrame, sample_only: bool = False) -> pd.DataFrame:
         """
         Transform Scene+ transaction data into standardized format.
         
         Args:
             data: Raw Scene+ transaction DataFrame
+            sample_only: Only transform the first SAMPLE_SIZE rows
             
         Returns:
             DataFrame: Transformed and validated data
@@ -32,8 +34,12 @@ class SceneTransformer(BaseTransformer):
             # Reset error records
             self.clear_errors()
             
-            # Standardize column names
-            data = data.rename(columns={
+            # Skip the rest of the batch when only a sample is displayed
+            if sample_only:
+                data = data.head(self.SAMPLE_SIZE)
+            
+            # Standardize column names and types in one pass
+            data = self._standardize(data, {
                 'scene_transaction_id': 'transaction_id',
                 'scene_member_id': 'member_id',
                 'type': 'transaction_type',
@@ -41,34 +47,20 @@ class SceneTransformer(BaseTransformer):
                 'timestamp': 'transaction_timestamp',
                 'partner_name': 'partner',
                 'original_transaction_id': 'source_transaction_id'
+            }, {
+                'transaction_timestamp': self._parse_timestamps,
+                'points': lambda column: column.astype(float),
+                'transaction_type': self._lowercase_category,
+                'partner': self._lowercase_category
             })
             
-            # Ensure datetime format
-            data['transaction_timestamp'] = pd.to_datetime(data['transaction_timestamp'])
-            
-            # Convert points to float
-            data['points'] = data['points'].astype(float)
-            
-            # Standardize transaction types
-            data['transaction_type'] = data['transaction_type'].str.lower()
-            
-            # Standardize partner names
-            data['partner'] = data['partner'].str.lower()
-            
-            # Handle missing source transaction IDs
-            data['source_transaction_id'] = data['source_transaction_id'].fillna(None)
-            
-            # Validate each record
-            validated_records = []
-            for record in data.to_dict('records'):
-                validated = self.validate_record(record)
-                if validated:
-                    validated_records.append(validated)
+            # Validate the batch
+            validated, _ = self.validate_frame(data)
             
-            if not validated_records:
+            if validated.empty:
                 raise TransformationError("No valid records after transformation")
             
-            return pd.DataFrame(validated_records)
+            return validated
             
         except Exception as e:
             raise TransformationError(f"Failed to transform Scene+ data: {str(e)}")
@@ -84,15 +76,14 @@ class SceneTransformer(BaseTransformer):
             DataFrame: Aggregated points by member
         """
         try:
-            return data.groupby('member_id').agg({
-                'points': lambda x: sum(x * (x.index.get_level_values('transaction_type') == 'earn') - 
-                                     x * (x.index.get_level_values('transaction_type') == 'redeem')),
-                'transaction_timestamp': 'max',
-                'transaction_id': 'count'
-            }).rename(columns={
-                'points': 'total_points',
-                'transaction_timestamp': 'last_activity',
-                'transaction_id': 'transaction_count'
-            }).reset_index()
+            # Earned points count up, redeemed points count down
+            sign = np.where(data['transaction_type'].eq('earn').to_numpy(), 1.0, -1.0)
+            return data.assign(
+                signed_points=data['points'].to_numpy() * sign
+            ).groupby('member_id', sort=False, observed=True).agg(
+                total_points=('signed_points', 'sum'),
+                last_activity=('transaction_timestamp', 'max'),
+                transaction_count=('transaction_id', 'size')
+            ).reset_index()
         except Exception as e:
             raise TransformationError(f"Failed to aggregate member points: {str(e)}") 
\ No newline at end of file
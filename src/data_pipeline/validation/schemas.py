@@ -2,8 +2,27 @@
 Data validation schemas for Scene+ data pipeline.
 """
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+from functools import lru_cache
+from typing import Annotated, Any, List, Literal, Optional, Type
+from pydantic import BaseModel, BeforeValidator, Field, TypeAdapter
+
+
+def _lowercase(v: Any) -> Any:
+    """Lowercase string input before literal matching."""
+    return v.lower() if isinstance(v, str) else v
+
+
+# Case-insensitive enumerations, matched by pydantic-core
+TransactionType = Annotated[Literal['earn', 'redeem'], BeforeValidator(_lowercase)]
+Tier = Annotated[Literal['standard', 'silver', 'gold', 'platinum'], BeforeValidator(_lowercase)]
+PartnerId = Annotated[Literal['cineplex', 'scotiabank'], BeforeValidator(_lowercase)]
+
+
+class Item(BaseModel):
+    """Schema for a purchased item."""
+    sku: str = Field(..., description="Item SKU")
+    quantity: int = Field(..., gt=0, description="Quantity purchased")
+    price: float = Field(..., ge=0, description="Unit price")
 
 
 class RetailTransaction(BaseModel):
@@ -14,38 +33,20 @@ class RetailTransaction(BaseModel):
     transaction_timestamp: datetime = Field(..., description="Transaction timestamp")
     total_amount: float = Field(..., ge=0, description="Total transaction amount")
     banner: str = Field(..., description="Retail banner (Sobeys, Safeway, etc.)")
-    items: List[dict] = Field(..., description="List of items purchased")
+    items: List[Item] = Field(..., min_length=1, description="List of items purchased")
     payment_method: str = Field(..., description="Payment method used")
     points_earned: Optional[float] = Field(0.0, description="Scene+ points earned")
-    
-    @validator('items')
-    def validate_items(cls, v):
-        """Validate items structure."""
-        if not v:
-            raise ValueError("Transaction must have at least one item")
-        for item in v:
-            if not all(k in item for k in ['sku', 'quantity', 'price']):
-                raise ValueError("Each item must have sku, quantity, and price")
-        return v
 
 
 class SceneTransaction(BaseModel):
     """Schema for Scene+ transaction data."""
     transaction_id: str = Field(..., description="Unique transaction identifier")
     member_id: str = Field(..., description="Scene+ member identifier")
-    transaction_type: str = Field(..., description="Type of transaction (earn/redeem)")
+    transaction_type: TransactionType = Field(..., description="Type of transaction (earn/redeem)")
     points: float = Field(..., description="Points earned or redeemed")
     transaction_timestamp: datetime = Field(..., description="Transaction timestamp")
     partner: str = Field(..., description="Partner where transaction occurred")
     source_transaction_id: Optional[str] = Field(None, description="Original transaction ID")
-    
-    @validator('transaction_type')
-    def validate_transaction_type(cls, v):
-        """Validate transaction type."""
-        valid_types = ['earn', 'redeem']
-        if v.lower() not in valid_types:
-            raise ValueError(f"Transaction type must be one of {valid_types}")
-        return v.lower()
 
 
 class CustomerProfile(BaseModel):
@@ -54,34 +55,29 @@ class CustomerProfile(BaseModel):
     scene_member_id: Optional[str] = Field(None, description="Scene+ member identifier")
     join_date: datetime = Field(..., description="Customer join date")
     total_points: float = Field(0.0, ge=0, description="Total Scene+ points balance")
-    tier: str = Field("standard", description="Customer tier")
+    tier: Tier = Field("standard", description="Customer tier")
     preferred_banner: Optional[str] = Field(None, description="Most frequented banner")
     active_status: bool = Field(True, description="Whether customer is active")
-    
-    @validator('tier')
-    def validate_tier(cls, v):
-        """Validate customer tier."""
-        valid_tiers = ['standard', 'silver', 'gold', 'platinum']
-        if v.lower() not in valid_tiers:
-            raise ValueError(f"Tier must be one of {valid_tiers}")
-        return v.lower()
 
 
 class PartnerTransaction(BaseModel):
     """Schema for partner (Cineplex, Scotiabank) transaction data."""
     transaction_id: str = Field(..., description="Unique transaction identifier")
-    partner_id: str = Field(..., description="Partner identifier")
+    partner_id: PartnerId = Field(..., description="Partner identifier")
     member_id: str = Field(..., description="Scene+ member identifier")
     transaction_timestamp: datetime = Field(..., description="Transaction timestamp")
     transaction_type: str = Field(..., description="Type of transaction")
     amount: float = Field(..., ge=0, description="Transaction amount")
     points: float = Field(..., description="Points earned or redeemed")
     location: Optional[str] = Field(None, description="Transaction location")
-    
-    @validator('partner_id')
-    def validate_partner(cls, v):
-        """Validate partner identifier."""
-        valid_partners = ['cineplex', 'scotiabank']
-        if v.lower() not in valid_partners:
-            raise ValueError(f"Partner must be one of {valid_partners}")
-        return v.lower() 
\ No newline at end of file
+
+
+@lru_cache(maxsize=None)
+def get_list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """Return the compiled List[schema] validator, building it on first use."""
+    return TypeAdapter(List[schema])
+
+
+# Compile the transaction validators at import so forked workers inherit them
+for _schema in (RetailTransaction, SceneTransaction, PartnerTransaction):
+    get_list_adapter(_schema)
@@ -2,13 +2,19 @@
 Base classes for Scene+ analytics models.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import joblib
 import pandas as pd
 import numpy as np
 from sklearn.base import BaseEstimator
 from datetime import datetime
 
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESSION = ('lz4', 3)
+except ImportError:
+    MODEL_COMPRESSION = ('zlib', 3)
+
 
 class ModelError(Exception):
     """Base class for model exceptions."""
@@ -36,6 +42,8 @@ class BaseModel(ABC):
         self.target_column: Optional[str] = None
         self.last_trained: Optional[datetime] = None
         self.model_params: Dict[str, Any] = {}
+        # Sorted importances, cached alongside the model they were read from
+        self._feature_importance: Optional[Tuple[Any, Optional[pd.DataFrame]]] = None
 
     @abstractmethod
     def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -86,12 +94,14 @@ class BaseModel(ABC):
         """
         pass
 
-    def save_model(self, path: str) -> None:
+    def save_model(self, path: str, compress: bool = True) -> None:
         """
         Save the trained model to disk.
         
         Args:
             path: Path to save the model
+            compress: Compress with LZ4 (zlib if lz4 is not installed);
+                disable to allow memory-mapped loading
         """
         if self.model is None:
             raise ModelError("No trained model to save")
@@ -101,49 +111,91 @@ class BaseModel(ABC):
             'feature_columns': self.feature_columns,
             'target_column': self.target_column,
             'last_trained': self.last_trained,
-            'model_params': self.model_params
+            'model_params': self.model_params,
+            **self._get_state()
         }
         
         try:
-            joblib.dump(model_data, path)
+            joblib.dump(
+                model_data,
+                path,
+                compress=MODEL_COMPRESSION if compress else 0,
+                protocol=5
+            )
         except Exception as e:
             raise ModelError(f"Failed to save model: {str(e)}")
 
-    def load_model(self, path: str) -> None:
+    def load_model(self, path: str, mmap_mode: Optional[str] = None) -> None:
         """
         Load a trained model from disk.
         
         Args:
             path: Path to load the model from
+            mmap_mode: Memory-map numpy arrays from an uncompressed model
+                file instead of reading them into memory (e.g. 'r')
         """
         try:
-            model_data = joblib.load(path)
+            model_data = joblib.load(path, mmap_mode=mmap_mode)
             self.model = model_data['model']
             self.feature_columns = model_data['feature_columns']
             self.target_column = model_data['target_column']
             self.last_trained = model_data['last_trained']
             self.model_params = model_data['model_params']
+            self._set_state(model_data)
         except Exception as e:
             raise ModelError(f"Failed to load model: {str(e)}")
 
+    def _get_state(self) -> Dict[str, Any]:
+        """
+        Extra fitted state to persist alongside the model.
+        
+        Subclasses holding state outside the estimator (e.g. scaling
+        parameters) extend this together with _set_state.
+        
+        Returns:
+            Dict: State entries to store in the model file
+        """
+        return {}
+
+    def _set_state(self, model_data: Dict[str, Any]) -> None:
+        """
+        Restore the extra fitted state written by _get_state.
+        
+        Args:
+            model_data: Loaded model file contents
+        """
+
     def get_feature_importance(self) -> Optional[pd.DataFrame]:
         """
         Get feature importance scores if available.
         
+        The sorted frame is computed once per trained model and shared
+        between calls.
+        
         Returns:
             Optional[DataFrame]: Feature importance scores
         """
         if self.model is None:
             raise ModelError("No trained model available")
         
+        if self._feature_importance and self._feature_importance[0] is self.model:
+            return self._feature_importance[1]
+        
         try:
-            if hasattr(self.model, 'feature_importances_'):
-                importance = pd.DataFrame({
-                    'feature': self.feature_columns,
-                    'importance': self.model.feature_importances_
-                })
-                return importance.sort_values('importance', ascending=False)
-            return None
+            importance = None
+            importances = getattr(self.model, 'feature_importances_', None)
+            if importances is not None:
+                importances = np.asarray(importances)
+                order = np.argsort(-importances, kind='stable')
+                importance = pd.DataFrame(
+                    {
+                        'feature': np.asarray(self.feature_columns)[order],
+                        'importance': importances[order]
+                    },
+                    index=order
+                )
+            self._feature_importance = (self.model, importance)
+            return importance
         except Exception as e:
             raise ModelError(f"Failed to get feature importance: {str(e)}")
 
@@ -157,10 +209,13 @@ class BaseModel(ABC):
         Raises:
             FeatureError: If data validation fails
         """
-        if data.empty:
+        if len(data.index) == 0:
             raise FeatureError("Input data is empty")
         
-        missing_cols = set(self.feature_columns) - set(data.columns)
+        # One pass over the feature columns against a hashed column set;
+        # faster than Index.difference/get_indexer for a handful of columns
+        present = set(data.columns)
+        missing_cols = [col for col in self.feature_columns if col not in present]
         if missing_cols:
             raise FeatureError(f"Missing required columns: {missing_cols}")
 
@@ -1,11 +1,10 @@
 """
 Customer segmentation model using clustering techniques.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from datetime import datetime, timedelta
 
 from .base import BaseModel, ModelError, FeatureError
@@ -14,6 +13,9 @@ from .base import BaseModel, ModelError, FeatureError
 class CustomerSegmentation(BaseModel):
     """Customer segmentation model using K-means clustering."""
 
+    # Customer count above which training switches to mini-batch K-means
+    MINIBATCH_THRESHOLD = 50_000
+
     def __init__(self, n_clusters: int = 5):
         """
         Initialize customer segmentation model.
@@ -23,7 +25,11 @@ class CustomerSegmentation(BaseModel):
         """
         super().__init__("customer_segmentation")
         self.n_clusters = n_clusters
-        self.scaler = StandardScaler()
+        self._mean: Optional[np.ndarray] = None
+        self._std: Optional[np.ndarray] = None
+        # Descriptions are derived from the fitted centers only, so they are
+        # cached alongside the model they were computed for
+        self._segment_descriptions: Optional[Tuple[Any, Dict[int, str]]] = None
         self.model_params = {'n_clusters': n_clusters}
         self.feature_columns = [
             'total_spend',
@@ -57,80 +63,78 @@ class CustomerSegmentation(BaseModel):
                 raise FeatureError(f"Missing required columns: {missing_cols}")
 
             # Calculate customer-level metrics
-            current_date = data['transaction_timestamp'].max()
-            
-            customer_metrics = data.groupby('customer_id').agg({
-                'transaction_timestamp': [
-                    'count',
-                    'max',
-                    lambda x: (current_date - x.max()).days
-                ],
-                'total_amount': ['sum', 'mean'],
-                'points_earned': ['sum', 'mean'],
-                'banner': lambda x: x.nunique(),
-                'items': lambda x: np.mean([len(items) for items in x])
-            })
+            customer_metrics = data.assign(
+                basket_size=data['items'].str.len()
+            ).groupby('customer_id').agg(
+                transaction_count=('transaction_timestamp', 'count'),
+                last_transaction_date=('transaction_timestamp', 'max'),
+                total_spend=('total_amount', 'sum'),
+                average_transaction_value=('total_amount', 'mean'),
+                total_points=('points_earned', 'sum'),
+                average_points_earned=('points_earned', 'mean'),
+                unique_banners=('banner', 'nunique'),
+                average_basket_size=('basket_size', 'mean')
+            )
 
-            # Flatten column names
-            customer_metrics.columns = [
-                'transaction_count',
-                'last_transaction_date',
+            # Recency in whole days relative to the latest transaction,
+            # taken from the per-customer maxima rather than a full scan
+            last_transaction_date = customer_metrics['last_transaction_date']
+            current_date = last_transaction_date.max()
+            customer_metrics.insert(
+                2,
                 'days_since_last_visit',
-                'total_spend',
-                'average_transaction_value',
-                'total_points',
-                'average_points_earned',
-                'unique_banners',
-                'average_basket_size'
-            ]
+                (current_date - last_transaction_date).dt.days
+            )
 
             return customer_metrics.reset_index()
 
         except Exception as e:
             raise FeatureError(f"Error preprocessing data: {str(e)}")
 
-    def engineer_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def engineer_features(self, data: pd.DataFrame, fit: bool = True) -> pd.DataFrame:
         """
         Create features for customer segmentation.
         
         Args:
             data: Preprocessed customer data
+            fit: Fit the standardization parameters on data; otherwise
+                apply the ones fitted during training
             
         Returns:
             DataFrame: Data with engineered features
         """
         try:
-            features = pd.DataFrame()
-            
-            # Total spend
-            features['total_spend'] = data['total_spend']
-            
-            # Visit frequency (transactions per month)
-            date_range = (data['last_transaction_date'].max() - 
-                        data['last_transaction_date'].min()).days / 30
-            features['visit_frequency'] = data['transaction_count'] / date_range
-            
-            # Points metrics
-            features['points_balance'] = data['total_points']
-            features['points_redemption_rate'] = data['average_points_earned'] / data['average_transaction_value']
-            
-            # Cross-banner shopping
-            features['cross_banner_shopping'] = data['unique_banners']
-            
-            # Basket metrics
-            features['basket_size'] = data['average_basket_size']
-            
-            # Recency
-            features['days_since_last_visit'] = data['days_since_last_visit']
-            
-            # Product variety
-            features['product_categories_count'] = data['unique_banners'] * data['average_basket_size']
+            unique_banners = data['unique_banners'].to_numpy(dtype=np.float64)
+            basket_size = data['average_basket_size'].to_numpy(dtype=np.float64)
+
+            # Visit frequency (transactions per month), over at least one day
+            # so a batch sharing one last visit date (e.g. a single customer)
+            # stays finite
+            date_range = max((data['last_transaction_date'].max() - 
+                              data['last_transaction_date'].min()).days, 1) / 30
+
+            # Feature matrix in feature_columns order
+            X = np.column_stack([
+                data['total_spend'].to_numpy(dtype=np.float64),
+                data['transaction_count'].to_numpy(dtype=np.float64) / date_range,
+                data['total_points'].to_numpy(dtype=np.float64),
+                data['average_points_earned'].to_numpy(dtype=np.float64)
+                / data['average_transaction_value'].to_numpy(dtype=np.float64),
+                unique_banners,
+                basket_size,
+                data['days_since_last_visit'].to_numpy(dtype=np.float64),
+                unique_banners * basket_size
+            ])
             
-            # Scale features
+            # Standardize features, leaving constant columns unscaled
+            if fit:
+                self._mean = X.mean(axis=0)
+                std = X.std(axis=0)
+                self._std = np.where(std == 0, 1.0, std)
             scaled_features = pd.DataFrame(
-                self.scaler.fit_transform(features),
-                columns=features.columns,
-                index=features.index
+                (X - self._mean) / self._std,
+                columns=self.feature_columns,
+                index=data.index
             )
             
             return scaled_features
@@ -153,12 +157,22 @@ class CustomerSegmentation(BaseModel):
             features = self.engineer_features(processed_data)
             
             # Initialize and train K-means model
-            self.model = KMeans(
-                n_clusters=self.n_clusters,
-                random_state=42
-            )
+            if len(features) > self.MINIBATCH_THRESHOLD:
+                self.model = MiniBatchKMeans(
+                    n_clusters=self.n_clusters,
+                    random_state=42,
+                    n_init='auto',
+                    batch_size=4096
+                )
+            else:
+                self.model = KMeans(
+                    n_clusters=self.n_clusters,
+                    random_state=42,
+                    n_init='auto',
+                    algorithm='lloyd'
+                )
             
-            self.model.fit(features)
+            self.model.fit(self._to_matrix(features))
             self.last_trained = datetime.now()
             
         except Exception as e:
@@ -174,13 +188,18 @@ class CustomerSegmentation(BaseModel):
         Returns:
             DataFrame: Customer segments with descriptions
         """
+        if self.model is None:
+            raise ModelError("Model has not been trained")
+        if self._mean is None or self._std is None:
+            raise ModelError("Model has no standardization parameters; retrain and save it again")
+        
         try:
-            # Preprocess and engineer features
+            # Preprocess and engineer features with the training scale
             processed_data = self.preprocess_data(data)
-            features = self.engineer_features(processed_data)
+            features = self.engineer_features(processed_data, fit=False)
             
             # Predict segments
-            segments = self.model.predict(features)
+            segments = self.model.predict(self._to_matrix(features))
             
             # Create results DataFrame
             results = pd.DataFrame({
@@ -188,16 +207,22 @@ class CustomerSegmentation(BaseModel):
                 'segment': segments
             })
             
-            # Add segment descriptions
-            results['segment_description'] = results['segment'].map(
-                self._get_segment_descriptions(features, segments)
-            )
+            # Add segment descriptions as a categorical over the k clusters
+            descriptions = self._get_segment_descriptions(features, segments)
+            results['segment_description'] = pd.Categorical(
+                [descriptions[segment_id] for segment_id in range(self.n_clusters)]
+            )[segments]
             
             return results
             
         except Exception as e:
             raise PredictionError(f"Error predicting segments: {str(e)}")
 
+    @staticmethod
+    def _to_matrix(features: pd.DataFrame) -> np.ndarray:
+        """Convert features to the contiguous float32 matrix used for clustering."""
+        return np.ascontiguousarray(features.to_numpy(), dtype=np.float32)
+
     def _get_segment_descriptions(self, features: pd.DataFrame, segments: np.ndarray) -> Dict[int, str]:
         """
         Generate descriptions for each customer segment.
@@ -209,43 +234,54 @@ class CustomerSegmentation(BaseModel):
         Returns:
             Dict: Mapping of segment IDs to descriptions
         """
+        if self._segment_descriptions and self._segment_descriptions[0] is self.model:
+            return self._segment_descriptions[1]
+
         # Calculate segment centers
         segment_centers = pd.DataFrame(
             self.model.cluster_centers_,
             columns=features.columns
         )
-        
+
+        # Determine key characteristics for all centers at once
+        characteristics = [
+            np.select(
+                [segment_centers['total_spend'] > 0.5, segment_centers['total_spend'] < -0.5],
+                ["high spender", "low spender"],
+                ""
+            ),
+            np.select(
+                [segment_centers['visit_frequency'] > 0.5, segment_centers['visit_frequency'] < -0.5],
+                ["frequent shopper", "infrequent shopper"],
+                ""
+            ),
+            np.where(segment_centers['cross_banner_shopping'] > 0.5, "multi-banner", ""),
+            np.select(
+                [segment_centers['points_balance'] > 0.5, segment_centers['points_redemption_rate'] > 0.5],
+                ["points saver", "points redeemer"],
+                ""
+            )
+        ]
+
+        # Create descriptions
         descriptions = {}
-        for segment_id in range(self.n_clusters):
-            center = segment_centers.iloc[segment_id]
-            
-            # Determine key characteristics
-            characteristics = []
-            
-            if center['total_spend'] > 0.5:
-                characteristics.append("high spender")
-            elif center['total_spend'] < -0.5:
-                characteristics.append("low spender")
-                
-            if center['visit_frequency'] > 0.5:
-                characteristics.append("frequent shopper")
-            elif center['visit_frequency'] < -0.5:
-                characteristics.append("infrequent shopper")
-                
-            if center['cross_banner_shopping'] > 0.5:
-                characteristics.append("multi-banner")
-            
-            if center['points_balance'] > 0.5:
-                characteristics.append("points saver")
-            elif center['points_redemption_rate'] > 0.5:
-                characteristics.append("points redeemer")
-                
-            # Create description
-            description = " & ".join(characteristics) if characteristics else "average"
+        for segment_id, traits in enumerate(zip(*characteristics)):
+            description = " & ".join(filter(None, traits)) or "average"
             descriptions[segment_id] = description.title()
-            
+
+        self._segment_descriptions = (self.model, descriptions)
         return descriptions
 
+    def _get_state(self) -> Dict[str, Any]:
+        """Persist the standardization parameters with the model."""
+        return {**super()._get_state(), 'mean': self._mean, 'std': self._std}
+
+    def _set_state(self, model_data: Dict[str, Any]) -> None:
+        """Restore the standardization parameters, absent from older model files."""
+        super()._set_state(model_data)
+        self._mean = model_data.get('mean')
+        self._std = model_data.get('std')
+
     def get_segment_profiles(self) -> pd.DataFrame:
         """
         Get detailed profiles for each segment.
@@ -255,10 +291,12 @@ class CustomerSegmentation(BaseModel):
         """
         if self.model is None:
             raise ModelError("Model has not been trained")
+        if self._mean is None or self._std is None:
+            raise ModelError("Model has no standardization parameters; retrain and save it again")
             
         # Get cluster centers
         centers = pd.DataFrame(
-            self.scaler.inverse_transform(self.model.cluster_centers_),
+            self.model.cluster_centers_ * self._std + self._mean,
             columns=self.feature_columns
         )
         
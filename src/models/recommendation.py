@@ -1,15 +1,24 @@
 """
 Recommendation engine for personalized Scene+ offers.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from enum import StrEnum
+from functools import lru_cache
+from joblib import Parallel, delayed, effective_n_jobs
 from sklearn.preprocessing import MinMaxScaler
 from .base import BaseModel, ModelError, FeatureError
 
 
-class OfferType:
+# Offer validity windows
+OFFER_DURATION_7D = timedelta(days=7)
+OFFER_DURATION_14D = timedelta(days=14)
+OFFER_DURATION_30D = timedelta(days=30)
+
+
+class OfferType(StrEnum):
     """Enumeration of offer types."""
     POINTS_MULTIPLIER = "points_multiplier"
     POINTS_BONUS = "points_bonus"
@@ -18,8 +27,53 @@ class OfferType:
     THRESHOLD_BONUS = "threshold_bonus"
 
 
+# Offer rules in evaluation order: (offer type, value, conditions, validity).
+# Offers with equal expected value are ranked in this order.
+OFFER_RULES = (
+    (OfferType.POINTS_MULTIPLIER, 2.0, {'min_spend': 50.0}, OFFER_DURATION_30D),  # 2x points
+    (OfferType.CROSS_BANNER, 500.0, {'min_spend': 75.0}, OFFER_DURATION_30D),  # bonus points
+    (OfferType.CATEGORY_DISCOUNT, 0.15, {'min_spend': 25.0}, OFFER_DURATION_14D),  # 15% discount
+    (OfferType.THRESHOLD_BONUS, 1000.0, {'spend_threshold': 150.0}, OFFER_DURATION_30D),  # bonus points
+    (OfferType.POINTS_BONUS, 250.0, {'min_spend': 25.0}, OFFER_DURATION_7D)  # bonus points
+)
+OFFER_RULE_INDEX = {rule[0]: i for i, rule in enumerate(OFFER_RULES)}
+
+# Customer-dependent expected value factors by offer type. Each takes the
+# customer metrics (a profile row, or a mapping of metric arrays covering
+# many customers) and the offer conditions.
+OFFER_VALUE_FACTORS = {
+    OfferType.POINTS_MULTIPLIER: lambda customer, conditions: customer['average_points'],
+    OfferType.THRESHOLD_BONUS: lambda customer, conditions: (
+        customer['average_transaction'] / conditions['spend_threshold']
+    )
+}
+
+# Banners targeted by cross-banner offers, with their lowercase match keys
+_ALL_BANNERS = ('Sobeys', 'Safeway', 'IGA', 'Foodland', 'FreshCo')
+_ALL_BANNERS_LOWER = tuple(banner.lower() for banner in _ALL_BANNERS)
+
+
+@lru_cache(maxsize=256)
+def _banners_not_shopped(shopped: str) -> Tuple[str, ...]:
+    """Banners whose name does not appear in a lowercased banner string."""
+    return tuple(
+        banner for banner, key in zip(_ALL_BANNERS, _ALL_BANNERS_LOWER)
+        if key not in shopped
+    )
+
+
 class Offer:
     """Class representing a personalized offer."""
+
+    __slots__ = (
+        'offer_type',
+        'value',
+        'conditions',
+        'start_date',
+        'end_date',
+        'target_banners',
+        'target_categories'
+    )
     
     def __init__(
         self,
@@ -55,10 +109,29 @@ class Offer:
 class RecommendationEngine(BaseModel):
     """Engine for generating personalized offers."""
 
-    def __init__(self):
-        """Initialize recommendation engine."""
+    # Smallest customer set worth fanning offer building out to workers
+    PARALLEL_MIN_CUSTOMERS = 50_000
+
+    # Expected-value multipliers by customer segment
+    segment_multipliers = {
+        'High Spender': 1.2,
+        'Frequent Shopper': 1.1,
+        'Points Saver': 1.3,
+        'Multi-Banner': 1.15
+    }
+
+    def __init__(self, n_jobs: int = 1):
+        """
+        Initialize recommendation engine.
+        
+        Args:
+            n_jobs: Worker processes used to build offers for large customer
+                sets (joblib semantics, -1 for all cores)
+        """
         super().__init__("recommendation_engine")
         self.scaler = MinMaxScaler()
+        self.n_jobs = n_jobs
+        self.model_params = {'n_jobs': n_jobs}
         self.feature_columns = [
             'total_spend',
             'visit_frequency',
@@ -91,76 +164,91 @@ class RecommendationEngine(BaseModel):
                 raise FeatureError(f"Missing required columns: {missing_cols}")
 
             # Calculate customer metrics
-            customer_metrics = data.groupby('customer_id').agg({
-                'transaction_timestamp': [
-                    'count',
-                    lambda x: (datetime.now() - x.max()).days
-                ],
-                'total_amount': ['sum', 'mean'],
-                'points_earned': ['sum', 'mean'],
-                'banner': 'nunique',
-                'items': lambda x: np.mean([len(items) for items in x])
-            }).reset_index()
-
-            # Flatten column names
-            customer_metrics.columns = [
-                'customer_id', 'transaction_count', 'days_since_last_visit',
-                'total_spend', 'average_transaction', 'total_points',
-                'average_points', 'unique_banners', 'average_basket_size'
-            ]
+            now = datetime.now()
+            customer_metrics = data.assign(
+                basket_size=data['items'].str.len()
+            ).groupby('customer_id').agg(
+                transaction_count=('transaction_timestamp', 'count'),
+                last_visit=('transaction_timestamp', 'max'),
+                total_spend=('total_amount', 'sum'),
+                average_transaction=('total_amount', 'mean'),
+                total_points=('points_earned', 'sum'),
+                average_points=('points_earned', 'mean'),
+                unique_banners=('banner', 'nunique'),
+                average_basket_size=('basket_size', 'mean')
+            )
+
+            # Banners shopped, space-joined, for cross-banner targeting
+            customer_metrics['banner'] = (
+                data[['customer_id', 'banner']].drop_duplicates()
+                .astype({'banner': str})
+                .groupby('customer_id')['banner'].agg(' '.join)
+            )
+            customer_metrics = customer_metrics.reset_index()
+
+            # Recency in whole days
+            customer_metrics.insert(
+                2,
+                'days_since_last_visit',
+                (now - customer_metrics.pop('last_visit')).dt.days
+            )
 
             return customer_metrics
 
         except Exception as e:
             raise FeatureError(f"Error preprocessing data: {str(e)}")
 
-    def engineer_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def engineer_features(self, data: pd.DataFrame, per_customer: bool = False) -> pd.DataFrame:
         """
         Create features for offer recommendations.
         
         Args:
             data: Preprocessed customer data
+            per_customer: Scale each customer on their own data, as if they
+                were the only customer given, rather than across the frame
             
         Returns:
             DataFrame: Data with engineered features
         """
         try:
-            features = pd.DataFrame()
-            
-            # Spending patterns
-            features['total_spend'] = self.scaler.fit_transform(
-                data[['total_spend']]
-            )
+            # Min-max scale spending, points, shopping and recency columns
+            # in a single fit so the scaler keeps the stats for all of them
+            scaled_columns = {
+                'total_spend': 'total_spend',
+                'points_balance': 'total_points',
+                'cross_banner_shopping': 'unique_banners',
+                'basket_size': 'average_basket_size',
+                'days_since_last_visit': 'days_since_last_visit'
+            }
+            if per_customer:
+                # Preprocessed data has one row per customer, and min-max
+                # scaling a single row maps every value to 0
+                scaled = np.zeros((len(data), len(scaled_columns)))
+            else:
+                scaled = self.scaler.fit_transform(
+                    data[list(scaled_columns.values())].to_numpy()
+                )
+            columns = dict(zip(scaled_columns, scaled.T))
             
             # Visit patterns
-            features['visit_frequency'] = data['transaction_count'] / (
-                data['days_since_last_visit'] + 1
+            columns['visit_frequency'] = data['transaction_count'].to_numpy() / (
+                data['days_since_last_visit'].to_numpy() + 1
             )
             
             # Points behavior
-            features['points_balance'] = self.scaler.fit_transform(
-                data[['total_points']]
-            )
-            features['points_redemption_rate'] = data['average_points'] / (
-                data['average_transaction'] + 1
+            columns['points_redemption_rate'] = data['average_points'].to_numpy() / (
+                data['average_transaction'].to_numpy() + 1
             )
             
-            # Shopping patterns
-            features['cross_banner_shopping'] = self.scaler.fit_transform(
-                data[['unique_banners']]
-            )
-            features['basket_size'] = self.scaler.fit_transform(
-                data[['average_basket_size']]
+            # Category diversity
+            columns['category_diversity'] = (
+                columns['cross_banner_shopping'] * columns['basket_size']
             )
             
-            # Recency
-            features['days_since_last_visit'] = self.scaler.fit_transform(
-                data[['days_since_last_visit']]
+            features = pd.DataFrame(
+                {column: columns[column] for column in self.feature_columns},
+                index=data.index
             )
-            
-            # Category diversity
-            features['category_diversity'] = features['cross_banner_shopping'] * features['basket_size']
-            
             return features
 
         except Exception as e:
@@ -170,7 +258,8 @@ class RecommendationEngine(BaseModel):
         self,
         customer_data: pd.DataFrame,
         segment_data: pd.DataFrame,
-        n_offers: int = 3
+        n_offers: int = 3,
+        per_customer: bool = False
     ) -> Dict[str, List[Offer]]:
         """
         Generate personalized offers for customers.
@@ -179,6 +268,8 @@ class RecommendationEngine(BaseModel):
             customer_data: Customer transaction data
             segment_data: Customer segment assignments
             n_offers: Number of offers to generate per customer
+            per_customer: Score each customer as if generating offers for
+                them alone, so results don't depend on the rest of the frame
             
         Returns:
             Dict: Mapping of customer IDs to list of recommended offers
@@ -186,126 +277,149 @@ class RecommendationEngine(BaseModel):
         try:
             # Preprocess and engineer features
             processed_data = self.preprocess_data(customer_data)
-            features = self.engineer_features(processed_data)
+            features = self.engineer_features(processed_data, per_customer=per_customer)
             
-            # Merge with segment data
-            customer_profiles = pd.merge(
-                processed_data,
-                segment_data[['customer_id', 'segment', 'segment_description']],
-                on='customer_id'
+            # Attach segment assignments; customers without one are dropped
+            segments = segment_data.set_index('customer_id')[['segment', 'segment_description']]
+            segments = segments[~segments.index.duplicated(keep='last')]
+            positions = segments.index.get_indexer(processed_data['customer_id'])
+            matched = positions >= 0
+            positions = positions[matched]
+            customer_profiles = processed_data[matched].assign(
+                segment=segments['segment'].to_numpy()[positions],
+                segment_description=segments['segment_description'].array.take(positions)
+            )
+            features = features[matched]
+
+            segment_multiplier = customer_profiles['segment_description'].map(
+                self.segment_multipliers
+            ).to_numpy(dtype=np.float64, na_value=1.0)
+            metrics = {
+                'average_points': customer_profiles['average_points'].to_numpy(),
+                'average_transaction': customer_profiles['average_transaction'].to_numpy()
+            }
+
+            now = datetime.now()
+
+            # Offer eligibility, one row per customer and one column per rule
+            eligible = np.column_stack([
+                (features['points_redemption_rate'] > 0.7).to_numpy(),
+                (features['cross_banner_shopping'] < 0.3).to_numpy(),
+                (features['category_diversity'] < 0.5).to_numpy(),
+                (features['total_spend'] > 0.7).to_numpy(),
+                (features['days_since_last_visit'] > 0.8).to_numpy()
+            ])
+
+            # Expected offer values, as in _calculate_offer_value
+            scores = np.tile(
+                np.array([rule[1] for rule in OFFER_RULES]),
+                (len(customer_profiles), 1)
+            )
+            for rule, (offer_type, _, conditions, _) in enumerate(OFFER_RULES):
+                factor = OFFER_VALUE_FACTORS.get(offer_type)
+                if factor is not None:
+                    scores[:, rule] *= factor(metrics, conditions)
+            scores *= segment_multiplier[:, np.newaxis]
+            scores[~eligible] = -np.inf
+
+            # Top N eligible rules per customer, highest value first. With only
+            # a handful of rule columns a stable row-wise argsort beats
+            # argpartition plus a re-sort, and it keeps rule order on ties.
+            top = np.argsort(-scores, axis=1, kind='stable')[:, :n_offers]
+            selected = np.take_along_axis(eligible, top, axis=1)
+
+            if self.n_jobs == 1 or len(customer_profiles) < self.PARALLEL_MIN_CUSTOMERS:
+                return self._build_offers(customer_profiles, top, selected, now)
+
+            # Customers are independent once scored, so build offers in blocks
+            blocks = np.array_split(
+                np.arange(len(customer_profiles)),
+                effective_n_jobs(self.n_jobs)
             )
-            
-            # Generate offers for each customer
             offers = {}
-            for _, customer in customer_profiles.iterrows():
-                offers[customer['customer_id']] = self._generate_customer_offers(
-                    customer,
-                    features.loc[customer.name],
-                    n_offers
+            for block_offers in Parallel(n_jobs=self.n_jobs)(
+                delayed(self._build_offers)(
+                    customer_profiles.iloc[block], top[block], selected[block], now
                 )
-            
+                for block in blocks
+            ):
+                offers.update(block_offers)
             return offers
 
         except Exception as e:
             raise ModelError(f"Error generating offers: {str(e)}")
 
-    def _generate_customer_offers(
+    def _build_offers(
         self,
-        customer: pd.Series,
-        features: pd.Series,
-        n_offers: int
-    ) -> List[Offer]:
-        """Generate offers for a specific customer."""
-        offers = []
-        
-        # Points multiplier offer
-        if features['points_redemption_rate'] > 0.7:
-            offers.append(Offer(
-                offer_type=OfferType.POINTS_MULTIPLIER,
-                value=2.0,  # 2x points
-                conditions={'min_spend': 50.0},
-                start_date=datetime.now(),
-                end_date=datetime.now() + timedelta(days=30)
-            ))
-        
-        # Cross-banner offer
-        if features['cross_banner_shopping'] < 0.3:
-            offers.append(Offer(
-                offer_type=OfferType.CROSS_BANNER,
-                value=500.0,  # bonus points
-                conditions={'min_spend': 75.0},
-                start_date=datetime.now(),
-                end_date=datetime.now() + timedelta(days=30),
-                target_banners=self._get_recommended_banners(customer)
-            ))
-        
-        # Category discount offer
-        if features['category_diversity'] < 0.5:
-            offers.append(Offer(
-                offer_type=OfferType.CATEGORY_DISCOUNT,
-                value=0.15,  # 15% discount
-                conditions={'min_spend': 25.0},
-                start_date=datetime.now(),
-                end_date=datetime.now() + timedelta(days=14),
-                target_categories=self._get_recommended_categories(customer)
-            ))
-        
-        # Threshold bonus offer
-        if features['total_spend'] > 0.7:
-            offers.append(Offer(
-                offer_type=OfferType.THRESHOLD_BONUS,
-                value=1000.0,  # bonus points
-                conditions={'spend_threshold': 150.0},
-                start_date=datetime.now(),
-                end_date=datetime.now() + timedelta(days=30)
-            ))
-        
-        # Points bonus offer
-        if features['days_since_last_visit'] > 0.8:
-            offers.append(Offer(
-                offer_type=OfferType.POINTS_BONUS,
-                value=250.0,  # bonus points
-                conditions={'min_spend': 25.0},
-                start_date=datetime.now(),
-                end_date=datetime.now() + timedelta(days=7)
+        customer_profiles: pd.DataFrame,
+        top: np.ndarray,
+        selected: np.ndarray,
+        now: datetime
+    ) -> Dict[str, List[Offer]]:
+        """Materialize the selected offer rules for a block of customers."""
+        customer_ids = customer_profiles['customer_id'].to_numpy()
+        rows, ranks = np.nonzero(selected)
+        rules = top[rows, ranks]
+
+        # Targets are only resolved for customers keeping those offers
+        cross_banner = OFFER_RULE_INDEX[OfferType.CROSS_BANNER]
+        cross_rows = rows[rules == cross_banner]
+        target_banners = dict(zip(
+            cross_rows.tolist(),
+            map(
+                self._get_recommended_banners,
+                customer_profiles.iloc[cross_rows].to_dict('records')
+            )
+        ))
+        category_discount = OFFER_RULE_INDEX[OfferType.CATEGORY_DISCOUNT]
+        category_rows = rows[rules == category_discount]
+        target_categories = dict(zip(
+            category_rows.tolist(),
+            map(
+                self._get_recommended_categories,
+                customer_profiles.iloc[category_rows].to_dict('records')
+            )
+        ))
+
+        # Materialize Offer objects for the selected rules only
+        end_dates = [now + rule[3] for rule in OFFER_RULES]
+        offers = {customer_id: [] for customer_id in customer_ids}
+        for row, rule in zip(rows.tolist(), rules.tolist()):
+            offer_type, value, conditions, _ = OFFER_RULES[rule]
+            offers[customer_ids[row]].append(Offer(
+                offer_type=offer_type,
+                value=value,
+                conditions=dict(conditions),
+                start_date=now,
+                end_date=end_dates[rule],
+                target_banners=target_banners[row] if rule == cross_banner else None,
+                target_categories=(
+                    target_categories[row] if rule == category_discount else None
+                )
             ))
-        
-        # Sort offers by expected value and return top N
-        return sorted(
-            offers,
-            key=lambda x: self._calculate_offer_value(x, customer),
-            reverse=True
-        )[:n_offers]
+
+        return offers
 
     def _calculate_offer_value(self, offer: Offer, customer: pd.Series) -> float:
         """Calculate expected value of an offer for a customer."""
         base_value = offer.value
         
         # Adjust value based on offer type and customer characteristics
-        if offer.offer_type == OfferType.POINTS_MULTIPLIER:
-            base_value *= customer['average_points']
-        elif offer.offer_type == OfferType.THRESHOLD_BONUS:
-            base_value *= (customer['average_transaction'] / offer.conditions['spend_threshold'])
+        factor = OFFER_VALUE_FACTORS.get(offer.offer_type)
+        if factor is not None:
+            base_value *= factor(customer, offer.conditions)
         
         # Adjust for customer segment
-        segment_multipliers = {
-            'High Spender': 1.2,
-            'Frequent Shopper': 1.1,
-            'Points Saver': 1.3,
-            'Multi-Banner': 1.15
-        }
-        
-        multiplier = segment_multipliers.get(customer['segment_description'], 1.0)
+        multiplier = self.segment_multipliers.get(customer['segment_description'], 1.0)
         return base_value * multiplier
 
-    def _get_recommended_banners(self, customer: pd.Series) -> List[str]:
+    def _get_recommended_banners(self, customer: Mapping[str, Any]) -> List[str]:
         """Get recommended banners for cross-banner offers."""
         # This would typically use collaborative filtering or similar
         # For now, return a simple list
-        all_banners = ['Sobeys', 'Safeway', 'IGA', 'Foodland', 'FreshCo']
-        return [b for b in all_banners if b.lower() not in customer['banner'].lower()]
+        return list(_banners_not_shopped(customer['banner'].lower()))
 
-    def _get_recommended_categories(self, customer: pd.Series) -> List[str]:
+    def _get_recommended_categories(self, customer: Mapping[str, Any]) -> List[str]:
         """Get recommended categories for category-specific offers."""
         # This would typically use collaborative filtering or similar
         # For now, return a simple list
@@ -2,21 +2,20 @@
 Example usage of the Scene+ recommendation engine.
 """
 import asyncio
+from collections import Counter
 import pandas as pd
 from typing import Dict, List, Any
 from datetime import datetime
-import json
+import orjson
 
 from data_pipeline.connectors.factory import ConnectorFactory
 from data_pipeline.transformers.retail import RetailTransformer
 from customer_segmentation import CustomerSegmentation
-from recommendation import RecommendationEngine, Offer
+from recommendation import RecommendationEngine
 
 
-def format_offer(offer: Offer) -> str:
+def format_offer(offer_dict: Dict[str, Any]) -> str:
     """Format offer details for display."""
-    offer_dict = offer.to_dict()
-    
     # Format basic offer details
     details = [
         f"Type: {offer_dict['offer_type']}",
@@ -51,17 +50,12 @@ def _format_value(offer_type: str, value: float) -> str:
 
 
 def save_recommendations(
-    customer_offers: Dict[str, List[Offer]],
+    formatted_offers: Dict[str, List[Dict[str, Any]]],
     filename: str = "recommendations.json"
 ) -> None:
-    """Save recommendations to a JSON file."""
-    formatted_offers = {
-        customer_id: [offer.to_dict() for offer in offers]
-        for customer_id, offers in customer_offers.items()
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(formatted_offers, f, indent=2)
+    """Save formatted recommendations to a JSON file."""
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(formatted_offers, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
 
 async def main():
@@ -103,15 +97,24 @@ async def main():
             n_offers=3
         )
         
+        # Format each offer once for display and saving
+        offer_dicts = {
+            customer_id: [offer.to_dict() for offer in offers]
+            for customer_id, offers in customer_offers.items()
+        }
+        
         # Analyze recommendations
-        total_customers = len(customer_offers)
-        total_offers = sum(len(offers) for offers in customer_offers.values())
+        total_customers = len(offer_dicts)
+        total_offers = sum(len(offers) for offers in offer_dicts.values())
         avg_offers = total_offers / total_customers
         
-        offer_types = {}
-        for offers in customer_offers.values():
-            for offer in offers:
-                offer_types[offer.offer_type] = offer_types.get(offer.offer_type, 0) + 1
+        offer_types = pd.Series(Counter(
+            offer['offer_type'] for offers in offer_dicts.values() for offer in offers
+        ), name='count').sort_values(ascending=False)
+        offer_type_distribution = pd.concat([
+            offer_types,
+            offer_types.div(total_offers).mul(100).rename('percentage')
+        ], axis=1)
         
         # Print summary
         print("\nRecommendation Summary:")
@@ -119,21 +122,19 @@ async def main():
         print(f"Total Offers Generated: {total_offers}")
         print(f"Average Offers per Customer: {avg_offers:.1f}")
         print("\nOffer Type Distribution:")
-        for offer_type, count in offer_types.items():
-            percentage = (count / total_offers) * 100
-            print(f"{offer_type}: {count} ({percentage:.1f}%)")
+        print(offer_type_distribution.to_string(float_format='%.1f'))
         
         # Print sample recommendations
         print("\nSample Recommendations:")
-        sample_customer = list(customer_offers.keys())[0]
+        sample_customer = next(iter(offer_dicts))
         print(f"\nCustomer ID: {sample_customer}")
-        for i, offer in enumerate(customer_offers[sample_customer], 1):
+        for i, offer in enumerate(offer_dicts[sample_customer], 1):
             print(f"\nOffer {i}:")
             print(format_offer(offer))
         
         # Save recommendations
         print("\nSaving recommendations...")
-        save_recommendations(customer_offers)
+        save_recommendations(offer_dicts)
         
         print("\nRecommendations complete! Check recommendations.json for full details.")
         
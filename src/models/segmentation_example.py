@@ -3,6 +3,7 @@ Example usage of the Scene+ customer segmentation model.
 """
 import asyncio
 import pandas as pd
+import numpy as np
 from typing import Dict, Any
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -23,15 +24,17 @@ def visualize_segments(segment_profiles: pd.DataFrame, save_path: str = None):
     """Create visualization of segment profiles."""
     # Prepare data for visualization
     features = segment_profiles.drop(['segment', 'description'], axis=1)
+    values = features.to_numpy(dtype=np.float64)
     
-    # Create heatmap
+    # Create heatmap with cell labels formatted in one vectorized pass
     plt.figure(figsize=(12, 8))
     sns.heatmap(
-        features,
+        values,
         cmap='RdYlBu_r',
         center=0,
-        annot=True,
-        fmt='.2f',
+        annot=np.char.mod('%.2f', values),
+        fmt='',
+        xticklabels=features.columns,
         yticklabels=segment_profiles['description']
     )
     plt.title('Customer Segment Profiles')
@@ -45,9 +48,11 @@ def visualize_segments(segment_profiles: pd.DataFrame, save_path: str = None):
 
 def analyze_segments(segments: pd.DataFrame, profiles: pd.DataFrame) -> Dict[str, Any]:
     """Analyze segment distribution and characteristics."""
+    segment_counts = segments['segment'].value_counts()
+    
     analysis = {
-        'segment_distribution': segments['segment'].value_counts().to_dict(),
-        'segment_percentages': (segments['segment'].value_counts(normalize=True) * 100).to_dict(),
+        'segment_distribution': segment_counts.to_dict(),
+        'segment_percentages': segment_counts.div(segment_counts.sum()).mul(100).to_dict(),
         'segment_profiles': profiles.to_dict('records'),
         'total_customers': len(segments)
     }
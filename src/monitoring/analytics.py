@@ -1,11 +1,69 @@
 """
 Analytics module for Scene+ recommendation service.
 """
-from typing import Dict, List, Any, Optional
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Mapping, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import json
+import orjson
+
+# Low-cardinality string columns used as filter and groupby keys
+_CATEGORICAL_COLUMNS = ('event_type', 'offer_type', 'segment', 'endpoint', 'model_name')
+
+
+def _normalize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of df with its key columns stored as categoricals."""
+    converted = {
+        column: df[column].astype('category')
+        for column in _CATEGORICAL_COLUMNS
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**converted) if converted else df
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Integer codes and labels of a column; missing values get code -1."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, labels = pd.factorize(values)
+    return codes, pd.Index(labels)
+
+
+def _tally_codes(
+    key_codes: np.ndarray,
+    event_codes: np.ndarray,
+    n_keys: int,
+    n_events: int
+) -> np.ndarray:
+    """
+    Count rows per (key, event type) code pair.
+    
+    Returns an (n_keys, n_events + 1) array; the last column counts rows
+    whose event type is missing. Rows with a missing key are dropped.
+    """
+    keyed = key_codes >= 0
+    event_slot = np.where(event_codes[keyed] >= 0, event_codes[keyed], n_events)
+    cells = key_codes[keyed].astype(np.int64) * (n_events + 1) + event_slot
+    return np.bincount(cells, minlength=n_keys * (n_events + 1)).reshape(n_keys, n_events + 1)
+
+
+def _add_tallies(total: Optional[pd.DataFrame], tally: pd.DataFrame) -> pd.DataFrame:
+    """Sum two per-key tallies, aligning on key."""
+    return tally if total is None else total.add(tally, fill_value=0)
+
+
+def _events_since(events: pd.DataFrame, cutoff_date: datetime) -> pd.DataFrame:
+    """Rows of events stamped at or after cutoff_date.
+
+    Time-ordered event logs are sliced at a binary-searched offset; other
+    frames fall back to a boolean mask over the timestamp column.
+    """
+    timestamps = events['timestamp']
+    if timestamps.is_monotonic_increasing:
+        return events.iloc[timestamps.searchsorted(cutoff_date, side='left'):]
+    return events[timestamps >= cutoff_date]
+
 
 class OfferAnalytics:
     """Analytics for offer performance."""
@@ -16,56 +74,68 @@ class OfferAnalytics:
     
     def analyze_offer_performance(
         self,
-        offer_events: pd.DataFrame,
+        offer_events: Union[pd.DataFrame, Iterable[pd.DataFrame]],
         customer_segments: pd.DataFrame
     ) -> Dict[str, Any]:
         """
         Analyze offer performance metrics.
         
         Args:
-            offer_events: DataFrame of offer events
+            offer_events: DataFrame of offer events, or an iterable of
+                DataFrame chunks that is consumed once
             customer_segments: DataFrame of customer segments
             
         Returns:
             Dict containing performance metrics
         """
-        # Filter events within lookback period
-        cutoff_date = datetime.now() - timedelta(days=self.lookback_days)
-        recent_events = offer_events[offer_events['timestamp'] >= cutoff_date]
+        if isinstance(offer_events, pd.DataFrame):
+            offer_events = (offer_events,)
         
-        # Calculate conversion rates
-        conversions = self._calculate_conversion_rates(recent_events)
+        customer_segments = _normalize_dtypes(customer_segments)
+        segment_of = customer_segments.set_index('customer_id')['segment']
         
-        # Calculate segment performance
-        segment_performance = self._analyze_segment_performance(
-            recent_events,
-            customer_segments
-        )
+        now = datetime.now()
+        cutoff_date = now - timedelta(days=self.lookback_days)
         
-        # Calculate offer type performance
-        offer_type_performance = self._analyze_offer_types(recent_events)
+        # Accumulate additive counts per chunk; rates are taken at the end
+        event_counts = Counter()
+        segment_tally = None
+        offer_type_tally = None
+        for chunk in offer_events:
+            # Filter events within lookback period
+            recent_events = _events_since(_normalize_dtypes(chunk), cutoff_date)
+            
+            event_counts.update(recent_events['event_type'].value_counts().to_dict())
+            segment_tally = _add_tallies(segment_tally, self._tally_events_by(
+                recent_events,
+                recent_events['customer_id'].map(segment_of)
+            ))
+            offer_type_tally = _add_tallies(offer_type_tally, self._tally_events_by(
+                recent_events,
+                recent_events['offer_type']
+            ))
         
         return {
-            'conversion_rates': conversions,
-            'segment_performance': segment_performance,
-            'offer_type_performance': offer_type_performance,
+            'conversion_rates': self._calculate_conversion_rates(event_counts),
+            'segment_performance': self._summarize_tally(segment_tally, 'offer_count'),
+            'offer_type_performance': self._summarize_tally(offer_type_tally, 'count'),
             'time_period': {
                 'start': cutoff_date.isoformat(),
-                'end': datetime.now().isoformat(),
+                'end': now.isoformat(),
                 'days': self.lookback_days
             }
         }
     
-    def _calculate_conversion_rates(self, events: pd.DataFrame) -> Dict[str, float]:
-        """Calculate conversion rates for different event types."""
-        total_offers = len(events[events['event_type'] == 'generate'])
+    def _calculate_conversion_rates(self, event_counts: Mapping[str, int]) -> Dict[str, float]:
+        """Calculate conversion rates from counts per event type."""
+        total_offers = event_counts.get('generate', 0)
         if total_offers == 0:
             return {}
         
         return {
-            'view_rate': len(events[events['event_type'] == 'view']) / total_offers,
-            'click_rate': len(events[events['event_type'] == 'click']) / total_offers,
-            'redemption_rate': len(events[events['event_type'] == 'redeem']) / total_offers
+            'view_rate': event_counts.get('view', 0) / total_offers,
+            'click_rate': event_counts.get('click', 0) / total_offers,
+            'redemption_rate': event_counts.get('redeem', 0) / total_offers
         }
     
     def _analyze_segment_performance(
@@ -74,42 +144,60 @@ class OfferAnalytics:
         segments: pd.DataFrame
     ) -> Dict[str, Dict[str, float]]:
         """Analyze performance by customer segment."""
-        merged_data = pd.merge(
-            events,
-            segments,
-            on='customer_id',
-            how='left'
-        )
-        
-        performance = {}
-        for segment in segments['segment'].unique():
-            segment_events = merged_data[merged_data['segment'] == segment]
-            
-            if len(segment_events) > 0:
-                performance[segment] = {
-                    'offer_count': len(segment_events[segment_events['event_type'] == 'generate']),
-                    'view_rate': len(segment_events[segment_events['event_type'] == 'view']) / len(segment_events),
-                    'redemption_rate': len(segment_events[segment_events['event_type'] == 'redeem']) / len(segment_events),
-                    'average_value': segment_events['offer_value'].mean()
-                }
+        # Only the segment label is needed, so look it up per event instead of joining
+        segment_of = segments.set_index('customer_id')['segment']
+        event_segments = events['customer_id'].map(segment_of)
         
-        return performance
+        return self._summarize_tally(self._tally_events_by(events, event_segments), 'offer_count')
     
     def _analyze_offer_types(self, events: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         """Analyze performance by offer type."""
-        performance = {}
-        for offer_type in events['offer_type'].unique():
-            type_events = events[events['offer_type'] == offer_type]
-            
-            if len(type_events) > 0:
-                performance[offer_type] = {
-                    'count': len(type_events[type_events['event_type'] == 'generate']),
-                    'view_rate': len(type_events[type_events['event_type'] == 'view']) / len(type_events),
-                    'redemption_rate': len(type_events[type_events['event_type'] == 'redeem']) / len(type_events),
-                    'average_value': type_events['offer_value'].mean()
-                }
+        return self._summarize_tally(self._tally_events_by(events, events['offer_type']), 'count')
+    
+    def _tally_events_by(self, events: pd.DataFrame, keys: pd.Series) -> pd.DataFrame:
+        """Additive event counts and offer value totals per group of keys."""
+        key_codes, key_labels = _factorize(keys)
+        event_codes, event_labels = _factorize(events['event_type'])
+        tally = _tally_codes(key_codes, event_codes, len(key_labels), len(event_labels))
         
-        return performance
+        def event_counts(event_type: str) -> np.ndarray:
+            if event_type in event_labels:
+                return tally[:, event_labels.get_loc(event_type)]
+            return np.zeros(len(key_labels), dtype=np.int64)
+        
+        # Rows without an offer value do not contribute to the group mean
+        values = events['offer_value'].to_numpy(dtype=np.float64)
+        valued = (key_codes >= 0) & ~np.isnan(values)
+        
+        rows = tally.sum(axis=1)
+        totals = pd.DataFrame({
+            'generate': event_counts('generate'),
+            'view': event_counts('view'),
+            'redeem': event_counts('redeem'),
+            'rows': rows,
+            'value_sum': np.bincount(key_codes[valued], weights=values[valued], minlength=len(key_labels)),
+            'value_count': np.bincount(key_codes[valued], minlength=len(key_labels))
+        }, index=key_labels)
+        
+        return totals[rows > 0]
+    
+    def _summarize_tally(
+        self,
+        tally: Optional[pd.DataFrame],
+        count_name: str
+    ) -> Dict[str, Dict[str, float]]:
+        """Offer counts, view/redemption rates and average value per group."""
+        if tally is None:
+            return {}
+        
+        summary = pd.DataFrame({
+            count_name: tally['generate'].astype(np.int64),
+            'view_rate': tally['view'] / tally['rows'],
+            'redemption_rate': tally['redeem'] / tally['rows'],
+            'average_value': tally['value_sum'] / tally['value_count']
+        })
+        
+        return summary.to_dict('index')
 
 
 class PerformanceAnalytics:
@@ -130,27 +218,33 @@ class PerformanceAnalytics:
         Returns:
             Dict containing performance metrics
         """
+        request_metrics = _normalize_dtypes(request_metrics)
+        
+        # Error and slow-request flags as plain boolean arrays, computed once
+        is_error = request_metrics['status'].to_numpy() >= 400
+        is_slow = request_metrics['latency'].to_numpy() > error_threshold_ms
+        latency_quantiles = request_metrics['latency'].quantile([0.5, 0.9, 0.99])
+        
         performance = {
             'request_count': len(request_metrics),
-            'error_rate': len(request_metrics[request_metrics['status'] >= 400]) / len(request_metrics),
+            'error_rate': int(is_error.sum()) / len(request_metrics),
             'latency': {
-                'p50': request_metrics['latency'].quantile(0.5),
-                'p90': request_metrics['latency'].quantile(0.9),
-                'p99': request_metrics['latency'].quantile(0.99)
+                'p50': latency_quantiles.iloc[0],
+                'p90': latency_quantiles.iloc[1],
+                'p99': latency_quantiles.iloc[2]
             },
             'endpoints': {}
         }
         
         # Analyze performance by endpoint
-        for endpoint in request_metrics['endpoint'].unique():
-            endpoint_data = request_metrics[request_metrics['endpoint'] == endpoint]
-            
-            performance['endpoints'][endpoint] = {
-                'request_count': len(endpoint_data),
-                'error_rate': len(endpoint_data[endpoint_data['status'] >= 400]) / len(endpoint_data),
-                'average_latency': endpoint_data['latency'].mean(),
-                'slow_requests': len(endpoint_data[endpoint_data['latency'] > error_threshold_ms])
-            }
+        flagged = request_metrics.assign(is_error=is_error, is_slow=is_slow)
+        endpoints = flagged.groupby('endpoint', sort=False, observed=True).agg(
+            request_count=('status', 'size'),
+            error_rate=('is_error', 'mean'),
+            average_latency=('latency', 'mean'),
+            slow_requests=('is_slow', 'sum')
+        )
+        performance['endpoints'] = endpoints.to_dict('index')
         
         return performance
     
@@ -167,18 +261,18 @@ class PerformanceAnalytics:
         Returns:
             Dict containing model performance metrics
         """
-        performance = {}
-        for model in prediction_metrics['model_name'].unique():
-            model_data = prediction_metrics[prediction_metrics['model_name'] == model]
-            
-            performance[model] = {
-                'prediction_count': len(model_data),
-                'average_latency': model_data['latency'].mean(),
-                'p95_latency': model_data['latency'].quantile(0.95),
-                'max_latency': model_data['latency'].max()
-            }
+        prediction_metrics = _normalize_dtypes(prediction_metrics)
         
-        return performance
+        latency = prediction_metrics.groupby('model_name', sort=False, observed=True)['latency']
+        
+        performance = pd.DataFrame({
+            'prediction_count': latency.size(),
+            'average_latency': latency.mean(),
+            'p95_latency': latency.quantile(0.95),
+            'max_latency': latency.max()
+        })
+        
+        return performance.to_dict('index')
 
 
 class CustomerAnalytics:
@@ -201,8 +295,11 @@ class CustomerAnalytics:
         Returns:
             Dict containing engagement metrics
         """
+        customer_events = _normalize_dtypes(customer_events)
+        segments = _normalize_dtypes(segments)
+        
         cutoff_date = datetime.now() - timedelta(days=lookback_days)
-        recent_events = customer_events[customer_events['timestamp'] >= cutoff_date]
+        recent_events = _events_since(customer_events, cutoff_date)
         
         # Merge with segments
         merged_data = pd.merge(
@@ -212,9 +309,11 @@ class CustomerAnalytics:
             how='left'
         )
         
+        active_customers = merged_data['customer_id'].nunique(dropna=False)
+        
         engagement = {
-            'active_customers': len(merged_data['customer_id'].unique()),
-            'events_per_customer': len(recent_events) / len(merged_data['customer_id'].unique()),
+            'active_customers': active_customers,
+            'events_per_customer': len(recent_events) / active_customers,
             'segment_engagement': self._analyze_segment_engagement(merged_data),
             'time_series': self._create_engagement_timeseries(merged_data)
         }
@@ -223,32 +322,54 @@ class CustomerAnalytics:
     
     def _analyze_segment_engagement(self, events: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         """Analyze engagement metrics by segment."""
-        engagement = {}
-        for segment in events['segment'].unique():
-            segment_events = events[events['segment'] == segment]
-            
-            engagement[segment] = {
-                'customer_count': len(segment_events['customer_id'].unique()),
-                'events_per_customer': len(segment_events) / len(segment_events['customer_id'].unique()),
-                'average_points_balance': segment_events['points_balance'].mean(),
-                'active_percentage': len(segment_events[segment_events['days_since_last_activity'] <= 30]) / len(segment_events)
-            }
+        grouped = events.assign(
+            is_active=events['days_since_last_activity'] <= 30
+        ).groupby('segment', sort=False, observed=True)
+        customer_counts = grouped['customer_id'].nunique(dropna=False)
         
-        return engagement
+        engagement = pd.DataFrame({
+            'customer_count': customer_counts,
+            'events_per_customer': grouped.size() / customer_counts,
+            'average_points_balance': grouped['points_balance'].mean(),
+            'active_percentage': grouped['is_active'].mean()
+        })
+        
+        return engagement.to_dict('index')
     
     def _create_engagement_timeseries(self, events: pd.DataFrame) -> Dict[str, List[float]]:
         """Create time series of engagement metrics."""
-        daily_metrics = events.groupby(pd.Grouper(key='timestamp', freq='D')).agg({
-            'customer_id': 'nunique',
-            'event_type': 'count',
-            'points_balance': 'mean'
-        }).reset_index()
+        timestamps = events['timestamp'].to_numpy(dtype='datetime64[ns]')
+        dated = ~np.isnat(timestamps)
+        if not dated.any():
+            return {'dates': [], 'active_customers': [], 'event_count': [], 'average_points': []}
+        
+        # Day offsets from the first event day; every day up to the last is reported
+        days = timestamps[dated].astype('datetime64[D]')
+        first_day = days.min()
+        day_index = (days - first_day).astype(np.int64)
+        n_days = int(day_index.max()) + 1
+        
+        customer_codes, customer_labels = _factorize(events['customer_id'])
+        customer_codes = customer_codes[dated].astype(np.int64)
+        known = customer_codes >= 0
+        day_customers = np.unique(day_index[known] * len(customer_labels) + customer_codes[known])
+        active_customers = np.bincount(day_customers // len(customer_labels), minlength=n_days)
+        
+        has_event = events['event_type'].notna().to_numpy()[dated]
+        event_count = np.bincount(day_index[has_event], minlength=n_days)
+        
+        points = events['points_balance'].to_numpy(dtype=np.float64)[dated]
+        has_points = ~np.isnan(points)
+        points_sum = np.bincount(day_index[has_points], weights=points[has_points], minlength=n_days)
+        points_count = np.bincount(day_index[has_points], minlength=n_days)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_points = points_sum / points_count
         
         return {
-            'dates': daily_metrics['timestamp'].dt.strftime('%Y-%m-%d').tolist(),
-            'active_customers': daily_metrics['customer_id'].tolist(),
-            'event_count': daily_metrics['event_type'].tolist(),
-            'average_points': daily_metrics['points_balance'].tolist()
+            'dates': np.datetime_as_string(first_day + np.arange(n_days), unit='D').tolist(),
+            'active_customers': active_customers.tolist(),
+            'event_count': event_count.tolist(),
+            'average_points': average_points.tolist()
         }
 
 
@@ -287,7 +408,11 @@ def generate_analytics_report(
     }
     
     if output_file:
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        # Segment labels may be integer cluster ids, hence non-string keys
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(
+                report,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
     
     return report 
\ No newline at end of file
@@ -1,93 +1,227 @@
 """
 Prometheus metrics for Scene+ recommendation service.
 """
-from prometheus_client import Counter, Histogram, Gauge, Summary
-from typing import Dict, Any
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, Gauge, Summary
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import asyncio
+import logging
 import time
+import numpy as np
 
-# API Metrics
-REQUEST_COUNT = Counter(
-    'scene_plus_request_total',
-    'Total number of requests',
-    ['endpoint', 'method', 'status']
-)
-
-REQUEST_LATENCY = Histogram(
-    'scene_plus_request_latency_seconds',
-    'Request latency in seconds',
-    ['endpoint', 'method'],
-    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
-)
-
-# Recommendation Metrics
-OFFER_GENERATION_COUNT = Counter(
-    'scene_plus_offers_generated_total',
-    'Total number of offers generated',
-    ['offer_type', 'segment']
-)
-
-OFFER_EVENTS = Counter(
-    'scene_plus_offer_events_total',
-    'Total number of offer events',
-    ['event_type', 'offer_type']
-)
-
-OFFER_VALUE = Histogram(
-    'scene_plus_offer_value',
-    'Distribution of offer values',
-    ['offer_type'],
-    buckets=(10, 25, 50, 100, 250, 500, 1000)
-)
-
-# Customer Metrics
-ACTIVE_CUSTOMERS = Gauge(
-    'scene_plus_active_customers',
-    'Number of active customers'
-)
-
-POINTS_BALANCE = Summary(
-    'scene_plus_points_balance',
-    'Distribution of customer points balances',
-    ['segment']
-)
-
-# Performance Metrics
-MODEL_PREDICTION_LATENCY = Histogram(
-    'scene_plus_model_prediction_seconds',
-    'Model prediction latency in seconds',
-    ['model_name'],
-    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
-)
-
-CACHE_HITS = Counter(
-    'scene_plus_cache_hits_total',
-    'Total number of cache hits',
-    ['cache_name']
-)
-
-CACHE_MISSES = Counter(
-    'scene_plus_cache_misses_total',
-    'Total number of cache misses',
-    ['cache_name']
-)
-
-# Database Metrics
-DB_QUERY_LATENCY = Histogram(
-    'scene_plus_db_query_seconds',
-    'Database query latency in seconds',
-    ['operation'],
-    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
-)
-
-DB_CONNECTION_POOL = Gauge(
-    'scene_plus_db_connections',
-    'Number of database connections in the pool',
-    ['state']
-)
+
+class _BisectHistogram(Histogram):
+    """Histogram whose observe() finds the bucket by binary search, not a scan."""
+    
+    def observe(self, amount: float, exemplar: Optional[Dict[str, str]] = None) -> None:
+        """Observe amount into the first bucket whose upper bound is >= amount."""
+        if exemplar:
+            return super().observe(amount, exemplar)
+        self._raise_if_not_observable()
+        self._sum.inc(amount)
+        self._buckets[bisect_left(self._upper_bounds, amount)].inc(1)
+
+
+@dataclass
+class ServiceMetrics:
+    """Service collectors, all registered on one registry."""
+    request_count: Counter
+    request_latency: Histogram
+    offer_generation_count: Counter
+    offer_events: Counter
+    offer_value: Histogram
+    active_customers: Gauge
+    points_balance: Summary
+    model_prediction_latency: Histogram
+    cache_hits: Counter
+    cache_misses: Counter
+    db_query_latency: Histogram
+    db_connection_pool: Gauge
+    # Labelled children by (metric, *label values), so hot paths skip labels()
+    children: Dict[Tuple[Any, ...], Any] = field(default_factory=dict)
+
+
+def build_metrics(registry: CollectorRegistry = REGISTRY) -> ServiceMetrics:
+    """Create the service collectors on registry; tests pass a fresh one."""
+    return ServiceMetrics(
+        # API Metrics
+        request_count=Counter(
+            'scene_plus_request_total',
+            'Total number of requests',
+            ['endpoint', 'method', 'status'],
+            registry=registry
+        ),
+        request_latency=_BisectHistogram(
+            'scene_plus_request_latency_seconds',
+            'Request latency in seconds',
+            ['endpoint', 'method'],
+            buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+            registry=registry
+        ),
+        # Recommendation Metrics
+        offer_generation_count=Counter(
+            'scene_plus_offers_generated_total',
+            'Total number of offers generated',
+            ['offer_type', 'segment'],
+            registry=registry
+        ),
+        offer_events=Counter(
+            'scene_plus_offer_events_total',
+            'Total number of offer events',
+            ['event_type', 'offer_type'],
+            registry=registry
+        ),
+        offer_value=_BisectHistogram(
+            'scene_plus_offer_value',
+            'Distribution of offer values',
+            ['offer_type'],
+            buckets=(10, 25, 50, 100, 250, 500, 1000),
+            registry=registry
+        ),
+        # Customer Metrics
+        active_customers=Gauge(
+            'scene_plus_active_customers',
+            'Number of active customers',
+            registry=registry
+        ),
+        points_balance=Summary(
+            'scene_plus_points_balance',
+            'Distribution of customer points balances',
+            ['segment'],
+            registry=registry
+        ),
+        # Performance Metrics
+        model_prediction_latency=_BisectHistogram(
+            'scene_plus_model_prediction_seconds',
+            'Model prediction latency in seconds',
+            ['model_name'],
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+            registry=registry
+        ),
+        cache_hits=Counter(
+            'scene_plus_cache_hits_total',
+            'Total number of cache hits',
+            ['cache_name'],
+            registry=registry
+        ),
+        cache_misses=Counter(
+            'scene_plus_cache_misses_total',
+            'Total number of cache misses',
+            ['cache_name'],
+            registry=registry
+        ),
+        # Database Metrics
+        db_query_latency=_BisectHistogram(
+            'scene_plus_db_query_seconds',
+            'Database query latency in seconds',
+            ['operation'],
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+            registry=registry
+        ),
+        db_connection_pool=Gauge(
+            'scene_plus_db_connections',
+            'Number of database connections in the pool',
+            ['state'],
+            registry=registry
+        )
+    )
+
+
+# Metrics recorded by the service, on the default registry
+_M = build_metrics()
+
+# Module-level names for the default metrics
+REQUEST_COUNT = _M.request_count
+REQUEST_LATENCY = _M.request_latency
+OFFER_GENERATION_COUNT = _M.offer_generation_count
+OFFER_EVENTS = _M.offer_events
+OFFER_VALUE = _M.offer_value
+ACTIVE_CUSTOMERS = _M.active_customers
+POINTS_BALANCE = _M.points_balance
+MODEL_PREDICTION_LATENCY = _M.model_prediction_latency
+CACHE_HITS = _M.cache_hits
+CACHE_MISSES = _M.cache_misses
+DB_QUERY_LATENCY = _M.db_query_latency
+DB_CONNECTION_POOL = _M.db_connection_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _labelled(metric, *label_values):
+    """Child of metric for the given label values, resolved once per label tuple."""
+    key = (metric, *label_values)
+    child = _M.children.get(key)
+    if child is None:
+        child = _M.children[key] = metric.labels(*label_values)
+    return child
+
+
+def observe_many(child, values: Iterable[float]) -> None:
+    """
+    Record a batch of observations on a labelled histogram or summary child.
+    
+    Histogram buckets are found with one searchsorted over the batch and
+    counted with bincount, instead of a bucket scan per observe() call.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return
+    
+    upper_bounds = getattr(child, '_upper_bounds', None)
+    if upper_bounds is not None:
+        counts = np.bincount(
+            np.searchsorted(upper_bounds, values, side='left'),
+            minlength=len(upper_bounds)
+        )
+        for bucket, count in zip(child._buckets, counts.tolist()):
+            if count:
+                bucket.inc(count)
+    else:
+        child._count.inc(len(values))
+    child._sum.inc(float(values.sum()))
+
+
+# Request samples (endpoint, method, status, elapsed_ns) awaiting a flush
+_pending: List[Tuple[str, str, str, int]] = []
+_flushed_at_ns = time.perf_counter_ns()
+FLUSH_INTERVAL_NS = 100_000_000
+
+
+def flush_request_metrics() -> None:
+    """Apply buffered request samples: one inc per label set, one batch observe per route."""
+    global _pending, _flushed_at_ns
+    samples, _pending = _pending, []
+    _flushed_at_ns = time.perf_counter_ns()
+    
+    counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
+    latencies: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for endpoint, method, status, elapsed_ns in samples:
+        counts[endpoint, method, status] += 1
+        latencies[endpoint, method].append(elapsed_ns)
+    
+    for labels, count in counts.items():
+        _labelled(_M.request_count, *labels).inc(count)
+    for labels, elapsed in latencies.items():
+        observe_many(_labelled(_M.request_latency, *labels), np.array(elapsed) / 1e9)
+
+
+async def run_metrics_flusher(interval: float = FLUSH_INTERVAL_NS / 1e9) -> None:
+    """Flush buffered request samples every interval seconds, so idle periods don't hold them back."""
+    while True:
+        await asyncio.sleep(interval)
+        flush_request_metrics()
 
 
 class MetricsMiddleware:
-    """Middleware to collect API metrics."""
+    """
+    Middleware to collect API metrics.
+    
+    Samples are buffered and applied by flush_request_metrics(); the API
+    runs run_metrics_flusher() from its startup hook and flushes once more
+    on shutdown.
+    """
     
     def __init__(self, app):
         """Initialize middleware."""
@@ -98,26 +232,24 @@ class MetricsMiddleware:
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
         
-        start_time = time.time()
+        method = scope["method"]
+        start_ns = time.perf_counter_ns()
         
         # Create a response interceptor
         async def send_wrapper(message):
             if message["type"] == "http.response.start":
-                # Record request metrics
-                endpoint = scope["path"]
-                method = scope["method"]
-                status = message["status"]
+                # Label by the matched route template and status class; raw paths
+                # carry customer and offer IDs and would add a series per ID
+                route = scope.get("route")
+                endpoint = route.path if route is not None else "unmatched"
+                status = f"{message['status'] // 100}xx"
                 
-                REQUEST_COUNT.labels(
-                    endpoint=endpoint,
-                    method=method,
-                    status=status
-                ).inc()
-                
-                REQUEST_LATENCY.labels(
-                    endpoint=endpoint,
-                    method=method
-                ).observe(time.time() - start_time)
+                # Buffer the sample; metrics are updated in batches at most every
+                # FLUSH_INTERVAL_NS, with elapsed time kept in integer nanoseconds
+                now_ns = time.perf_counter_ns()
+                _pending.append((endpoint, method, status, now_ns - start_ns))
+                if now_ns - _flushed_at_ns >= FLUSH_INTERVAL_NS:
+                    flush_request_metrics()
             
             await send(message)
         
@@ -126,56 +258,51 @@ class MetricsMiddleware:
 
 def track_offer_generation(offer: Dict[str, Any], segment: str):
     """Track offer generation metrics."""
-    OFFER_GENERATION_COUNT.labels(
-        offer_type=offer['offer_type'],
-        segment=segment
-    ).inc()
-    
-    OFFER_VALUE.labels(
-        offer_type=offer['offer_type']
-    ).observe(offer['value'])
+    offer_type = offer['offer_type']
+    _labelled(_M.offer_generation_count, offer_type, segment).inc()
+    _labelled(_M.offer_value, offer_type).observe(offer['value'])
 
 
-def track_offer_event(event_type: str, offer_type: str):
-    """Track offer event metrics."""
-    OFFER_EVENTS.labels(
-        event_type=event_type,
-        offer_type=offer_type
-    ).inc()
+def track_offer_event(event_type: str, offer_type: str, **metadata: Any):
+    """
+    Track offer event metrics.
+    
+    Only event and offer type become labels; free-form metadata is logged,
+    since every distinct label value would create a new series.
+    """
+    _labelled(_M.offer_events, event_type, offer_type).inc()
+    if metadata:
+        logger.debug("offer_event %s %s %s", event_type, offer_type, metadata)
 
 
 def track_model_prediction(model_name: str, duration: float):
     """Track model prediction latency."""
-    MODEL_PREDICTION_LATENCY.labels(
-        model_name=model_name
-    ).observe(duration)
+    _labelled(_M.model_prediction_latency, model_name).observe(duration)
 
 
 def track_db_operation(operation: str, duration: float):
     """Track database operation latency."""
-    DB_QUERY_LATENCY.labels(
-        operation=operation
-    ).observe(duration)
+    _labelled(_M.db_query_latency, operation).observe(duration)
 
 
 def update_customer_metrics(active_count: int, points_by_segment: Dict[str, float]):
     """Update customer-related metrics."""
-    ACTIVE_CUSTOMERS.set(active_count)
+    _M.active_customers.set(active_count)
     
     for segment, points in points_by_segment.items():
-        POINTS_BALANCE.labels(segment=segment).observe(points)
+        _labelled(_M.points_balance, segment).observe(points)
 
 
 def track_cache_operation(cache_name: str, hit: bool):
     """Track cache operations."""
     if hit:
-        CACHE_HITS.labels(cache_name=cache_name).inc()
+        _labelled(_M.cache_hits, cache_name).inc()
     else:
-        CACHE_MISSES.labels(cache_name=cache_name).inc()
+        _labelled(_M.cache_misses, cache_name).inc()
 
 
 def update_db_connections(active: int, idle: int, max_connections: int):
     """Update database connection pool metrics."""
-    DB_CONNECTION_POOL.labels(state="active").set(active)
-    DB_CONNECTION_POOL.labels(state="idle").set(idle)
-    DB_CONNECTION_POOL.labels(state="available").set(max_connections - active - idle) 
\ No newline at end of file
+    _labelled(_M.db_connection_pool, "active").set(active)
+    _labelled(_M.db_connection_pool, "idle").set(idle)
+    _labelled(_M.db_connection_pool, "available").set(max_connections - active - idle) 
\ No newline at end of file
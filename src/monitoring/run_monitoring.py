@@ -1,13 +1,16 @@
 """
 Script to run the Scene+ monitoring system.
 """
+import asyncio
 import os
-import subprocess
-import time
+import signal
 from pathlib import Path
+import aiohttp
 import yaml
-from prometheus_client import start_http_server
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess, start_http_server
 import logging
+import time
+from typing import Any, List
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +23,11 @@ logger = logging.getLogger(__name__)
 PROMETHEUS_PORT = int(os.getenv("PROMETHEUS_PORT", "9090"))
 GRAFANA_PORT = int(os.getenv("GRAFANA_PORT", "3000"))
 METRICS_PORT = int(os.getenv("METRICS_PORT", "8000"))
+STARTUP_TIMEOUT = float(os.getenv("MONITORING_STARTUP_TIMEOUT", "30"))
+SCRAPE_CACHE_TTL = float(os.getenv("METRICS_SCRAPE_CACHE_TTL", "0.5"))
+
+# Directory the API's gunicorn workers write their metric files to, if any
+METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
 
 # Paths
 MONITORING_DIR = Path(__file__).parent
@@ -77,63 +85,154 @@ default_home_dashboard_path = {DASHBOARDS_DIR}/scene_plus_dashboard.json
     logger.info("Created Grafana configuration")
 
 
-def start_prometheus():
+class CachedCollector:
+    """
+    Collector replaying another collector's samples for ttl seconds.
+    
+    Scrapes arriving within ttl of each other are served the same samples,
+    instead of re-reading every metric (or every worker's metric files).
+    """
+    
+    def __init__(self, collector, ttl: float = 0.5):
+        """Initialize with the collector (or registry) to cache."""
+        self.collector = collector
+        self.ttl = ttl
+        self._collected_at = float('-inf')
+        self._metrics: List[Any] = []
+    
+    def collect(self):
+        """Samples from the wrapped collector, collected at most once per ttl."""
+        now = time.monotonic()
+        if now - self._collected_at >= self.ttl:
+            self._metrics = list(self.collector.collect())
+            self._collected_at = now
+        return iter(self._metrics)
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve metrics, aggregated across API worker processes when they share a directory."""
+    if METRICS_MULTIPROC_DIR:
+        collector = multiprocess.MultiProcessCollector(None, path=METRICS_MULTIPROC_DIR)
+    else:
+        collector = REGISTRY
+    
+    # Back-to-back scrapes reuse one collection instead of re-reading every sample
+    registry = CollectorRegistry()
+    registry.register(CachedCollector(collector, ttl=SCRAPE_CACHE_TTL))
+    start_http_server(port, registry=registry)
+    
+    logger.info(f"Started metrics server on port {port}")
+
+
+async def wait_until_ready(name: str, url: str, process: asyncio.subprocess.Process):
+    """Poll a service's health endpoint until it answers or its process exits."""
+    deadline = asyncio.get_running_loop().time() + STARTUP_TIMEOUT
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=1)) as session:
+        while asyncio.get_running_loop().time() < deadline:
+            if process.returncode is not None:
+                raise RuntimeError(f"{name} exited with code {process.returncode}")
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(0.5)
+    
+    raise TimeoutError(f"{name} not ready after {STARTUP_TIMEOUT:.0f}s")
+
+
+async def start_prometheus() -> asyncio.subprocess.Process:
     """Start Prometheus server."""
     try:
-        subprocess.Popen([
+        process = await asyncio.create_subprocess_exec(
             "prometheus",
             f"--config.file={PROMETHEUS_CONFIG}",
             f"--web.listen-address=:{PROMETHEUS_PORT}",
             "--storage.tsdb.retention.time=15d"
-        ])
+        )
         logger.info(f"Started Prometheus on port {PROMETHEUS_PORT}")
+        return process
         
     except Exception as e:
         logger.error(f"Failed to start Prometheus: {e}")
         raise
 
 
-def start_grafana():
+async def start_grafana() -> asyncio.subprocess.Process:
     """Start Grafana server."""
     try:
-        subprocess.Popen([
+        process = await asyncio.create_subprocess_exec(
             "grafana-server",
             f"--config={GRAFANA_CONFIG}",
             f"--homepath={DASHBOARDS_DIR}"
-        ])
+        )
         logger.info(f"Started Grafana on port {GRAFANA_PORT}")
+        return process
         
     except Exception as e:
         logger.error(f"Failed to start Grafana: {e}")
         raise
 
 
-def main():
+async def stop_processes(*processes: asyncio.subprocess.Process):
+    """Terminate any still-running service processes and reap them."""
+    for process in processes:
+        if process.returncode is None:
+            process.terminate()
+    await asyncio.gather(*(process.wait() for process in processes))
+
+
+async def main():
     """Run the monitoring system."""
+    processes = []
     try:
         # Create configuration files
         create_prometheus_config()
         create_grafana_config()
         
         # Start Prometheus metrics server
-        start_http_server(METRICS_PORT)
-        logger.info(f"Started metrics server on port {METRICS_PORT}")
+        start_metrics_server()
         
-        # Start monitoring services
-        start_prometheus()
-        start_grafana()
+        # Shut down on SIGINT/SIGTERM
+        shutdown = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, shutdown.set)
         
-        # Keep the script running
-        while True:
-            time.sleep(1)
-            
-    except KeyboardInterrupt:
-        logger.info("Shutting down monitoring system")
+        # Start monitoring services and wait for their health endpoints
+        prometheus = await start_prometheus()
+        processes.append(prometheus)
+        grafana = await start_grafana()
+        processes.append(grafana)
+        
+        await asyncio.gather(
+            wait_until_ready("Prometheus", f"http://localhost:{PROMETHEUS_PORT}/-/ready", prometheus),
+            wait_until_ready("Grafana", f"http://localhost:{GRAFANA_PORT}/api/health", grafana)
+        )
+        logger.info("Monitoring services are ready")
         
+        # Block until a shutdown signal or until either service exits
+        waiters = [
+            asyncio.create_task(shutdown.wait()),
+            *(asyncio.create_task(process.wait()) for process in processes)
+        ]
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+        
+        for name, process in zip(("Prometheus", "Grafana"), processes):
+            if process.returncode is not None:
+                logger.error(f"{name} exited with code {process.returncode}")
+        logger.info("Shutting down monitoring system")
+            
     except Exception as e:
         logger.error(f"Error running monitoring system: {e}")
         raise
+    
+    finally:
+        await stop_processes(*processes)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
@@ -1,179 +1,239 @@
 """
 Pytest configuration and shared fixtures.
+
+The sample_* frames are built once per session and shared, so tests must
+treat them as read-only and copy before modifying.
 """
+import os
 import pytest
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List
+from functools import lru_cache
+from unittest.mock import MagicMock
+from typing import TYPE_CHECKING, Dict, List
 
-from src.models.customer_segmentation import CustomerSegmentation
-from src.models.recommendation import RecommendationEngine, Offer
+# The models pull in sklearn; import them only in the fixtures that build them
+if TYPE_CHECKING:
+    from src.models.customer_segmentation import CustomerSegmentation
+    from src.models.recommendation import RecommendationEngine
 
 
-@pytest.fixture
+# Label tables for the categorical sample columns; rows draw codes into them
+_ENDPOINTS = np.array([
+    '/customer/{id}',
+    '/offers/generate',
+    '/offers/track',
+    '/offers/{id}'
+], dtype=object)
+_METHODS = np.array(['GET', 'POST'], dtype=object)
+_MODEL_NAMES = np.array(['customer_segmentation', 'recommendation_engine'], dtype=object)
+_BANNERS = np.array(['Sobeys', 'Safeway', 'IGA', 'Foodland'], dtype=object)
+_EVENT_TYPES = np.array(['generate', 'view', 'click', 'redeem'], dtype=object)
+_OFFER_TYPES = np.array([
+    'points_multiplier', 'points_bonus', 'cross_banner',
+    'category_discount', 'threshold_bonus'
+], dtype=object)
+
+# Unit-mean exponential draws shared by the latency columns, scaled per fixture
+_EXPONENTIAL_POOL = np.random.default_rng(42).standard_exponential(10_000)
+_EXPONENTIAL_POOL.flags.writeable = False
+
+
+def _ids(prefix: str, numbers: np.ndarray) -> np.ndarray:
+    """IDs such as CUST007: prefix plus zero-padded three-digit numbers."""
+    return np.char.add(prefix, np.char.zfill(numbers.astype(str), 3))
+
+
+# ID strings formatted once at import; customers are CUST001-CUST020,
+# baskets hold up to 5 SKUs and the fixtures number at most 500 rows
+_CUSTOMER_IDS = _ids('CUST', np.arange(21)).astype(object)
+_SKUS = tuple(f'SKU{i:03d}' for i in range(5))
+_EVENT_IDS = _ids('EVENT', np.arange(100)).astype(object)
+_OFFER_IDS = _ids('OFFER', np.arange(100)).astype(object)
+_PRED_IDS = _ids('PRED', np.arange(500)).astype(object)
+
+
+def _categorical(rng: np.random.Generator, labels: np.ndarray, n: int) -> pd.Categorical:
+    """n labels drawn uniformly, built straight from integer codes."""
+    return pd.Categorical.from_codes(rng.integers(0, len(labels), n), labels)
+
+
+@lru_cache(maxsize=None)
+def _customer_ids(n: int, seed: int) -> np.ndarray:
+    """n customer IDs drawn from CUST001-CUST020; cached, so do not modify."""
+    ids = _CUSTOMER_IDS[np.random.default_rng(seed).integers(1, 21, n)]
+    ids.flags.writeable = False
+    return ids
+
+
+def _recent_timestamps(rng: np.random.Generator, n: int, high: int, unit: str) -> np.ndarray:
+    """n datetime64[ns] timestamps between 0 and high-1 NumPy units (D, m) before now."""
+    now = np.datetime64(pd.Timestamp.now(), 'ns')
+    return now - rng.integers(0, high, n).astype(f'timedelta64[{unit}]')
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _single_process_metrics() -> None:
+    """Keep prometheus_client in-memory, so xdist workers never share sample files."""
+    assert 'PROMETHEUS_MULTIPROC_DIR' not in os.environ, (
+        "unset PROMETHEUS_MULTIPROC_DIR before running the tests"
+    )
+
+
+@pytest.fixture(scope="session")
 def sample_transaction_data() -> pd.DataFrame:
     """Generate sample transaction data for testing."""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     # Generate 100 sample transactions
     n_samples = 100
     
+    # Draw every basket item in bulk, then split the draws per transaction
+    basket_sizes = rng.integers(1, 6, n_samples)
+    basket_ends = np.cumsum(basket_sizes)[:-1]
+    quantities = np.split(rng.integers(1, 5, basket_sizes.sum()), basket_ends)
+    prices = np.split(rng.uniform(5, 50, basket_sizes.sum()), basket_ends)
+    
     data = {
-        'customer_id': [f'CUST{i:03d}' for i in np.random.randint(1, 21, n_samples)],
-        'transaction_timestamp': [
-            datetime.now() - timedelta(days=np.random.randint(0, 30))
-            for _ in range(n_samples)
-        ],
-        'total_amount': np.random.uniform(10, 200, n_samples),
-        'banner': np.random.choice(['Sobeys', 'Safeway', 'IGA', 'Foodland'], n_samples),
-        'points_earned': np.random.uniform(10, 1000, n_samples),
+        'customer_id': _customer_ids(n_samples, 42),
+        'transaction_timestamp': _recent_timestamps(rng, n_samples, 30, 'D'),
+        'total_amount': rng.uniform(10, 200, n_samples),
+        'banner': _categorical(rng, _BANNERS, n_samples),
+        'points_earned': rng.uniform(10, 1000, n_samples),
         'items': [
             [
-                {
-                    'sku': f'SKU{i:03d}',
-                    'quantity': np.random.randint(1, 5),
-                    'price': np.random.uniform(5, 50)
-                }
-                for i in range(np.random.randint(1, 6))
+                {'sku': sku, 'quantity': quantity, 'price': price}
+                for sku, quantity, price in zip(_SKUS, basket_quantities.tolist(), basket_prices.tolist())
             ]
-            for _ in range(n_samples)
+            for basket_quantities, basket_prices in zip(quantities, prices)
         ]
     }
     
     return pd.DataFrame(data)
 
 
-@pytest.fixture
-def sample_customer_segments(sample_transaction_data: pd.DataFrame) -> pd.DataFrame:
-    """Generate sample customer segments."""
-    # Initialize and train segmentation model
+@pytest.fixture(scope="session")
+def trained_segmentation_model(sample_transaction_data: pd.DataFrame) -> 'CustomerSegmentation':
+    """Segmentation model trained once on the sample transactions; do not retrain."""
+    from src.models.customer_segmentation import CustomerSegmentation
+    
     model = CustomerSegmentation(n_clusters=5)
     model.train(sample_transaction_data)
+    return model
+
+
+@pytest.fixture(scope="session")
+def sample_customer_segments(
+    trained_segmentation_model: 'CustomerSegmentation',
+    sample_transaction_data: pd.DataFrame
+) -> pd.DataFrame:
+    """Generate sample customer segments."""
+    return trained_segmentation_model.predict(sample_transaction_data)
+
+
+@pytest.fixture(scope="session")
+def preprocessed_transactions(sample_transaction_data: pd.DataFrame) -> pd.DataFrame:
+    """Sample transactions aggregated by the recommendation engine's preprocessing."""
+    from src.models.recommendation import RecommendationEngine
     
-    # Get segments
-    return model.predict(sample_transaction_data)
+    return RecommendationEngine().preprocess_data(sample_transaction_data)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def preprocessed_for_segmentation(sample_transaction_data: pd.DataFrame) -> pd.DataFrame:
+    """Sample transactions aggregated by the segmentation model's preprocessing."""
+    from src.models.customer_segmentation import CustomerSegmentation
+    
+    return CustomerSegmentation().preprocess_data(sample_transaction_data)
+
+
+@pytest.fixture(scope="session")
 def sample_offer_events() -> pd.DataFrame:
     """Generate sample offer events for testing."""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     # Generate 100 sample events
     n_samples = 100
     
     data = {
-        'event_id': [f'EVENT{i:03d}' for i in range(n_samples)],
-        'customer_id': [f'CUST{i:03d}' for i in np.random.randint(1, 21, n_samples)],
-        'offer_id': [f'OFFER{i:03d}' for i in range(n_samples)],
-        'event_type': np.random.choice(['generate', 'view', 'click', 'redeem'], n_samples),
-        'offer_type': np.random.choice([
-            'points_multiplier', 'points_bonus', 'cross_banner',
-            'category_discount', 'threshold_bonus'
-        ], n_samples),
-        'offer_value': np.random.uniform(10, 1000, n_samples),
-        'timestamp': [
-            datetime.now() - timedelta(days=np.random.randint(0, 30))
-            for _ in range(n_samples)
-        ]
+        'event_id': _EVENT_IDS[:n_samples],
+        'customer_id': _customer_ids(n_samples, 42),
+        'offer_id': _OFFER_IDS[:n_samples],
+        'event_type': _categorical(rng, _EVENT_TYPES, n_samples),
+        'offer_type': _categorical(rng, _OFFER_TYPES, n_samples),
+        'offer_value': rng.uniform(10, 1000, n_samples),
+        'timestamp': _recent_timestamps(rng, n_samples, 30, 'D')
     }
     
     return pd.DataFrame(data)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_offer_events_by_type(sample_offer_events: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Sample offer events split once by event type, for tests needing one slice."""
+    return dict(tuple(sample_offer_events.groupby('event_type', sort=False, observed=True)))
+
+
+@pytest.fixture(scope="session")
 def sample_api_metrics() -> pd.DataFrame:
     """Generate sample API metrics for testing."""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     # Generate 1000 sample requests
     n_samples = 1000
     
     data = {
-        'timestamp': [
-            datetime.now() - timedelta(minutes=np.random.randint(0, 60))
-            for _ in range(n_samples)
-        ],
-        'endpoint': np.random.choice([
-            '/customer/{id}',
-            '/offers/generate',
-            '/offers/track',
-            '/offers/{id}'
-        ], n_samples),
-        'method': np.random.choice(['GET', 'POST'], n_samples),
-        'status': np.random.choice([200, 201, 400, 404, 500], n_samples, p=[0.8, 0.1, 0.05, 0.03, 0.02]),
-        'latency': np.random.exponential(0.1, n_samples)
+        'timestamp': _recent_timestamps(rng, n_samples, 60, 'm'),
+        'endpoint': _categorical(rng, _ENDPOINTS, n_samples),
+        'method': _categorical(rng, _METHODS, n_samples),
+        'status': rng.choice([200, 201, 400, 404, 500], n_samples, p=[0.8, 0.1, 0.05, 0.03, 0.02]),
+        'latency': _EXPONENTIAL_POOL[:n_samples] * 0.1
     }
     
     return pd.DataFrame(data)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_model_metrics() -> pd.DataFrame:
     """Generate sample model prediction metrics."""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     # Generate 500 sample predictions
     n_samples = 500
     
     data = {
-        'timestamp': [
-            datetime.now() - timedelta(minutes=np.random.randint(0, 60))
-            for _ in range(n_samples)
-        ],
-        'model_name': np.random.choice([
-            'customer_segmentation',
-            'recommendation_engine'
-        ], n_samples),
-        'latency': np.random.exponential(0.05, n_samples),
-        'prediction_id': [f'PRED{i:03d}' for i in range(n_samples)]
+        'timestamp': _recent_timestamps(rng, n_samples, 60, 'm'),
+        'model_name': _categorical(rng, _MODEL_NAMES, n_samples),
+        'latency': _EXPONENTIAL_POOL[:n_samples] * 0.05,
+        'prediction_id': _PRED_IDS[:n_samples]
     }
     
     return pd.DataFrame(data)
 
 
 @pytest.fixture
-def recommendation_engine() -> RecommendationEngine:
+def recommendation_engine() -> 'RecommendationEngine':
     """Create a recommendation engine instance for testing."""
+    from src.models.recommendation import RecommendationEngine
+    
     return RecommendationEngine()
 
 
 @pytest.fixture
-def segmentation_model() -> CustomerSegmentation:
+def segmentation_model() -> 'CustomerSegmentation':
     """Create a customer segmentation model instance for testing."""
+    from src.models.customer_segmentation import CustomerSegmentation
+    
     return CustomerSegmentation(n_clusters=5)
 
 
 @pytest.fixture
 def mock_db_session(monkeypatch):
     """Mock database session for testing."""
-    class MockDBSession:
-        def __init__(self):
-            self.committed = False
-            self.rolled_back = False
-            self.closed = False
-            self.queries = []
-        
-        def commit(self):
-            self.committed = True
-        
-        def rollback(self):
-            self.rolled_back = True
-        
-        def close(self):
-            self.closed = True
-        
-        def execute(self, query, params=None):
-            self.queries.append((query, params))
-            return self
-        
-        def fetchall(self):
-            return []
-        
-        def fetchone(self):
-            return None
-    
-    session = MockDBSession()
+    session = MagicMock(spec=['commit', 'rollback', 'close', 'execute', 'fetchall', 'fetchone'])
+    session.execute.return_value = session
+    session.fetchall.return_value = []
+    session.fetchone.return_value = None
+    
     monkeypatch.setattr("src.data_pipeline.db.Session", lambda: session)
-    return session 
\ No newline at end of file
+    return session
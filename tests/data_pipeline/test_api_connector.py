@@ -0,0 +1,41 @@
+"""
+Tests for API connector record conversion.
+"""
+import pytest
+
+from src.data_pipeline.connectors.api import APIConfig, APIConnector, APIFetchError
+
+
+@pytest.fixture
+def connector():
+    """API connector that is never connected."""
+    return APIConnector(APIConfig(
+        name="partner",
+        type="api",
+        base_url="http://localhost",
+        api_key="key",
+        api_secret=None,
+        endpoints={"transactions": "/transactions"}
+    ))
+
+
+def test_to_frame_keeps_fields_missing_from_first_record(connector):
+    """Test optional fields absent from the first record are kept."""
+    df = connector._to_frame([
+        {"transaction_id": "T001", "total_amount": 10.0},
+        {"transaction_id": "T002", "total_amount": 20.0, "original_transaction_id": "T001"}
+    ])
+    
+    assert list(df.columns) == ["transaction_id", "total_amount", "original_transaction_id"]
+    assert df["original_transaction_id"].isna().tolist() == [True, False]
+
+
+def test_to_frame_empty(connector):
+    """Test an empty page gives an empty frame."""
+    assert connector._to_frame([]).empty
+
+
+def test_to_frame_mixed_types_raise_fetch_error(connector):
+    """Test unconvertible records surface as APIFetchError."""
+    with pytest.raises(APIFetchError):
+        connector._to_frame([{"total_amount": 10.0}, {"total_amount": "ten"}])
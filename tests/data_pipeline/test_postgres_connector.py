@@ -0,0 +1,88 @@
+"""
+Tests for PostgreSQL connector connection handling and COPY parsing.
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from src.data_pipeline.connectors.postgres import PostgresConfig, PostgresConnector
+
+
+@pytest.fixture
+def unreachable_connector():
+    """Connector pointed at a port nothing listens on."""
+    return PostgresConnector(PostgresConfig(
+        name="retail",
+        type="postgres",
+        host="127.0.0.1",
+        port=1,
+        database="scene_plus_db",
+        user="user",
+        password="password",
+        timeout=1
+    ))
+
+
+@pytest.mark.asyncio
+async def test_connect_fails_for_unreachable_database(unreachable_connector):
+    """Test connect opens a connection instead of deferring the failure."""
+    with pytest.raises(ConnectionError):
+        await unreachable_connector.connect()
+    assert unreachable_connector.engine is None
+
+
+@pytest.mark.asyncio
+async def test_validate_connection_unreachable_database(unreachable_connector):
+    """Test validation reports an unreachable database."""
+    assert await unreachable_connector.validate_connection() is False
+
+
+def _copy_connection(columns, csv_text):
+    """Pooled connection whose driver returns the given result types and COPY output."""
+    statement = MagicMock()
+    statement.get_attributes.return_value = [
+        SimpleNamespace(name=name, type=SimpleNamespace(name=type_name))
+        for name, type_name in columns
+    ]
+    
+    async def copy_from_query(query, *args, output, **kwargs):
+        output.write(csv_text.encode())
+    
+    driver = SimpleNamespace(
+        prepare=AsyncMock(return_value=statement),
+        copy_from_query=copy_from_query
+    )
+    return SimpleNamespace(
+        get_raw_connection=AsyncMock(return_value=SimpleNamespace(driver_connection=driver))
+    )
+
+
+@pytest.mark.asyncio
+async def test_copy_frame_types_columns_from_result(unreachable_connector):
+    """Test COPY output is typed from the result columns, not inferred."""
+    connection = _copy_connection(
+        [
+            ("transaction_id", "text"),
+            ("is_return", "bool"),
+            ("quantity", "int4"),
+            ("total_amount", "numeric"),
+            ("created_at", "timestamptz"),
+            ("note", "text")
+        ],
+        "transaction_id,is_return,quantity,total_amount,created_at,note\n"
+        "00123,t,2,10.50,2024-01-02 03:04:05+05:30,\"\"\n"
+        "00124,f,,,2024-01-02 03:04:05+00,\n"
+    )
+    
+    df = await unreachable_connector._copy_frame(connection, "SELECT 1")
+    
+    assert df["transaction_id"].tolist() == ["00123", "00124"]
+    assert df["is_return"].dtype == "boolean"
+    assert df["is_return"].tolist() == [True, False]
+    assert str(df["quantity"].dtype) == "Int32"
+    assert df["quantity"].isna().tolist() == [False, True]
+    assert df["total_amount"].dtype == "float64"
+    assert str(df["created_at"].dt.tz) == "UTC"
+    assert df["created_at"].iloc[0].hour == 21
+    # A quoted empty string is a value, an unquoted empty field is NULL
+    assert df["note"].tolist() == ["", None]
@@ -0,0 +1,149 @@
+"""
+Tests for data pipeline transformers.
+"""
+import pytest
+import pandas as pd
+import pydantic
+
+from src.data_pipeline.transformers.base import TransformationError
+from src.data_pipeline.transformers.partner import PartnerTransformer
+from src.data_pipeline.transformers.retail import RetailTransformer
+from src.data_pipeline.transformers.scene import SceneTransformer
+
+
+def _retail(n: int = 4) -> pd.DataFrame:
+    """Raw retail transactions that are all valid."""
+    return pd.DataFrame({
+        'trans_id': [f'T{i:03d}' for i in range(n)],
+        'store_number': ['S001'] * n,
+        'cust_id': [f'CUST{i:03d}' for i in range(n)],
+        'timestamp': ['2024-01-15T10:30:00Z'] * n,
+        'amount': [25.5 + i for i in range(n)],
+        'retail_banner': ['Sobeys', 'SAFEWAY', 'IGA', 'Foodland'][:n],
+        'items': [[{'sku': 'SKU001', 'quantity': 2, 'price': 4.5}] for _ in range(n)],
+        'payment_type': ['credit'] * n,
+        'scene_points': [10.0] * n
+    })
+
+
+def _scene(n: int = 4) -> pd.DataFrame:
+    """Raw Scene+ transactions that are all valid."""
+    return pd.DataFrame({
+        'scene_transaction_id': [f'S{i:03d}' for i in range(n)],
+        'scene_member_id': [f'M{i:03d}' for i in range(n)],
+        'type': ['Earn', 'redeem', 'EARN', 'earn'][:n],
+        'points_value': [100.0 + i for i in range(n)],
+        'timestamp': ['2024-01-15T10:30:00+00:00'] * n,
+        'partner_name': ['Sobeys'] * n,
+        'original_transaction_id': [f'T{i:03d}' for i in range(n)]
+    })
+
+
+def _partner(n: int = 4) -> pd.DataFrame:
+    """Raw partner transactions that are all valid."""
+    return pd.DataFrame({
+        'partner_transaction_id': [f'P{i:03d}' for i in range(n)],
+        'partner': ['Cineplex', 'scotiabank', 'CINEPLEX', 'Scotiabank'][:n],
+        'scene_member_id': [f'M{i:03d}' for i in range(n)],
+        'timestamp': ['2024-01-15T10:30:00Z'] * n,
+        'transaction_category': ['movie'] * n,
+        'transaction_amount': [12.0 + i for i in range(n)],
+        'points_value': [50.0] * n,
+        'transaction_location': ['Toronto', None, 'Halifax', None][:n]
+    })
+
+
+def _retail_mixed() -> pd.DataFrame:
+    """Retail rows: valid, negative amount, int price (coerced), empty items."""
+    data = _retail()
+    data.at[1, 'amount'] = -5.0
+    data.at[2, 'items'] = [{'sku': 'SKU002', 'quantity': 1, 'price': 3}]
+    data.at[3, 'items'] = []
+    return data
+
+
+def _scene_mixed() -> pd.DataFrame:
+    """Scene+ rows: valid, unknown type, missing points (coerced NaN), valid."""
+    data = _scene()
+    data.at[1, 'type'] = 'transfer'
+    data.at[2, 'points_value'] = float('nan')
+    return data
+
+
+def _partner_mixed() -> pd.DataFrame:
+    """Partner rows: valid, unknown partner, negative amount, valid."""
+    data = _partner()
+    data.at[1, 'partner'] = 'amex'
+    data.at[2, 'transaction_amount'] = -1.0
+    return data
+
+
+CASES = {
+    'retail': (RetailTransformer, _retail, _retail_mixed, ['T000', 'T002'], 2),
+    'scene': (SceneTransformer, _scene, _scene_mixed, ['S000', 'S002', 'S003'], 1),
+    'partner': (PartnerTransformer, _partner, _partner_mixed, ['P000', 'P003'], 2)
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_transform_valid_batch(name):
+    """Test a clean batch is accepted whole."""
+    transformer_class, valid, _, _, _ = CASES[name]
+    transformer = transformer_class()
+    
+    result = transformer.transform(valid())
+    
+    assert len(result) == 4
+    assert list(result.columns) == list(transformer.schema.model_fields)
+    assert transformer.error_count == 0
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_transform_invalid_batch(name):
+    """Test a batch with no valid rows fails."""
+    transformer_class, _, mixed, expected_ids, _ = CASES[name]
+    data = mixed()
+    invalid = data[~data.iloc[:, 0].isin(expected_ids)]
+    
+    with pytest.raises(TransformationError):
+        transformer_class().transform(invalid)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_transform_mixed_batch(name):
+    """Test invalid rows are reported and coercible rows recovered, in input order."""
+    transformer_class, _, mixed, expected_ids, error_count = CASES[name]
+    transformer = transformer_class()
+    
+    result = transformer.transform(mixed())
+    
+    assert result['transaction_id'].tolist() == expected_ids
+    assert transformer.error_count == error_count
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_mixed_batch_dtypes_match_clean_batch(name):
+    """Test rows recovered through Pydantic come back with the fast path's dtypes."""
+    transformer_class, valid, mixed, _, _ = CASES[name]
+    
+    clean = transformer_class().transform(valid())
+    recovered = transformer_class().transform(mixed())
+    
+    for column in clean.columns:
+        assert type(recovered[column].dtype) is type(clean[column].dtype), column
+        if not isinstance(clean[column].dtype, pd.CategoricalDtype):
+            assert recovered[column].dtype == clean[column].dtype, column
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_fast_path_agrees_with_schema(name):
+    """Test every row the vectorized mask accepts is accepted unchanged by the schema."""
+    transformer_class, _, mixed, _, _ = CASES[name]
+    transformer = transformer_class()
+    adapter = pydantic.TypeAdapter(transformer.schema)
+    
+    data = transformer.transform(mixed())
+    records = transformer._records(data)
+    for record, fast in zip(records, transformer._valid_mask(data)):
+        if fast:
+            assert adapter.dump_python(adapter.validate_python(record)) == record
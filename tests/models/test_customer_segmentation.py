@@ -9,25 +9,19 @@ from datetime import datetime
 from src.models.customer_segmentation import CustomerSegmentation, ModelError, FeatureError
 
 
-def test_model_initialization():
-    """Test model initialization with default parameters."""
-    model = CustomerSegmentation()
-    assert model.n_clusters == 5
+@pytest.mark.parametrize("n_clusters,expected", [(None, 5), (3, 3)])
+def test_model_initialization(n_clusters, expected):
+    """Test model initialization with default and custom cluster counts."""
+    model = CustomerSegmentation() if n_clusters is None else CustomerSegmentation(n_clusters=n_clusters)
+    assert model.n_clusters == expected
     assert model.model_name == "customer_segmentation"
     assert model.model is None
     assert len(model.feature_columns) > 0
 
 
-def test_model_initialization_custom_clusters():
-    """Test model initialization with custom number of clusters."""
-    model = CustomerSegmentation(n_clusters=3)
-    assert model.n_clusters == 3
-
-
-def test_preprocess_data(sample_transaction_data):
+def test_preprocess_data(preprocessed_for_segmentation):
     """Test data preprocessing."""
-    model = CustomerSegmentation()
-    processed_data = model.preprocess_data(sample_transaction_data)
+    processed_data = preprocessed_for_segmentation
     
     # Check required columns are present
     required_metrics = [
@@ -59,11 +53,10 @@ def test_preprocess_data_missing_columns():
         model.preprocess_data(invalid_data)
 
 
-def test_engineer_features(sample_transaction_data):
+def test_engineer_features(preprocessed_for_segmentation):
     """Test feature engineering."""
     model = CustomerSegmentation()
-    processed_data = model.preprocess_data(sample_transaction_data)
-    features = model.engineer_features(processed_data)
+    features = model.engineer_features(preprocessed_for_segmentation)
     
     # Check all feature columns are present
     assert all(col in features.columns for col in model.feature_columns)
@@ -84,10 +77,9 @@ def test_train_model(sample_transaction_data):
     assert len(model.model.cluster_centers_) == model.n_clusters
 
 
-def test_predict_segments(sample_transaction_data):
+def test_predict_segments(trained_segmentation_model, sample_transaction_data):
     """Test segment prediction."""
-    model = CustomerSegmentation()
-    model.train(sample_transaction_data)
+    model = trained_segmentation_model
     
     segments = model.predict(sample_transaction_data)
     
@@ -104,10 +96,28 @@ def test_predict_without_training(sample_transaction_data):
         model.predict(sample_transaction_data)
 
 
-def test_get_segment_profiles(sample_transaction_data):
-    """Test getting segment profiles."""
+def test_predict_uses_training_scale(sample_transaction_data):
+    """Test prediction applies the training standardization to any batch."""
     model = CustomerSegmentation()
     model.train(sample_transaction_data)
+    mean, std = model._mean.copy(), model._std.copy()
+    
+    customer_id = sample_transaction_data['customer_id'].iloc[0]
+    single = sample_transaction_data[sample_transaction_data['customer_id'] == customer_id]
+    segments = model.predict(single)
+    features = model.engineer_features(model.preprocess_data(single), fit=False)
+    
+    # Predicting leaves the fitted parameters untouched, and a lone customer
+    # is not standardized by its own (zero-variance) statistics
+    np.testing.assert_array_equal(model._mean, mean)
+    np.testing.assert_array_equal(model._std, std)
+    assert len(segments) == 1
+    assert features.abs().to_numpy().max() > 0
+
+
+def test_get_segment_profiles(trained_segmentation_model):
+    """Test getting segment profiles."""
+    model = trained_segmentation_model
     
     profiles = model.get_segment_profiles()
     
@@ -117,6 +127,7 @@ def test_get_segment_profiles(sample_transaction_data):
     assert all(col in profiles.columns for col in model.feature_columns)
 
 
+@pytest.mark.slow
 def test_model_persistence(sample_transaction_data, tmp_path):
     """Test model saving and loading."""
     model = CustomerSegmentation()
@@ -134,13 +145,43 @@ def test_model_persistence(sample_transaction_data, tmp_path):
     original_predictions = model.predict(sample_transaction_data)
     loaded_predictions = new_model.predict(sample_transaction_data)
     
-    pd.testing.assert_frame_equal(original_predictions, loaded_predictions)
+    assert np.array_equal(
+        original_predictions['segment'].to_numpy(),
+        loaded_predictions['segment'].to_numpy()
+    )
+    assert np.array_equal(
+        pd.util.hash_pandas_object(original_predictions, index=False).to_numpy(),
+        pd.util.hash_pandas_object(loaded_predictions, index=False).to_numpy()
+    )
+    
+    # Scaling parameters survive the round trip
+    pd.testing.assert_frame_equal(
+        model.get_segment_profiles(),
+        new_model.get_segment_profiles()
+    )
 
 
-def test_feature_importance(sample_transaction_data):
-    """Test feature importance calculation."""
+def test_load_model_without_scaling_parameters(sample_transaction_data, tmp_path):
+    """Test a model file saved before scaling was persisted still loads."""
     model = CustomerSegmentation()
     model.train(sample_transaction_data)
+    model._get_state = lambda: {}
+    save_path = tmp_path / "segmentation_model.joblib"
+    model.save_model(str(save_path))
+    
+    new_model = CustomerSegmentation()
+    new_model.load_model(str(save_path))
+    
+    assert new_model.model is not None
+    with pytest.raises(ModelError, match="standardization"):
+        new_model.predict(sample_transaction_data)
+    with pytest.raises(ModelError, match="standardization"):
+        new_model.get_segment_profiles()
+
+
+def test_feature_importance(trained_segmentation_model):
+    """Test feature importance calculation."""
+    model = trained_segmentation_model
     
     importance = model.get_feature_importance()
     
@@ -167,10 +208,9 @@ def test_validate_input_data():
         model.validate_input_data(invalid_data)
 
 
-def test_get_model_info(sample_transaction_data):
+def test_get_model_info(trained_segmentation_model):
     """Test getting model information."""
-    model = CustomerSegmentation()
-    model.train(sample_transaction_data)
+    model = trained_segmentation_model
     
     info = model.get_model_info()
     
@@ -67,10 +67,9 @@ def test_engine_initialization():
     assert len(engine.feature_columns) > 0
 
 
-def test_preprocess_data(sample_transaction_data):
+def test_preprocess_data(preprocessed_transactions):
     """Test data preprocessing."""
-    engine = RecommendationEngine()
-    processed_data = engine.preprocess_data(sample_transaction_data)
+    processed_data = preprocessed_transactions
     
     required_columns = [
         'customer_id',
@@ -101,17 +100,17 @@ def test_preprocess_data_missing_columns():
         engine.preprocess_data(invalid_data)
 
 
-def test_engineer_features(sample_transaction_data):
+def test_engineer_features(preprocessed_transactions):
     """Test feature engineering."""
     engine = RecommendationEngine()
-    processed_data = engine.preprocess_data(sample_transaction_data)
-    features = engine.engineer_features(processed_data)
+    features = engine.engineer_features(preprocessed_transactions)
     
     assert all(col in features.columns for col in engine.feature_columns)
     assert features['total_spend'].between(0, 1).all()
     assert features['points_balance'].between(0, 1).all()
 
 
+@pytest.mark.slow
 def test_generate_offers(sample_transaction_data, sample_customer_segments):
     """Test offer generation."""
     engine = RecommendationEngine()
@@ -126,7 +125,7 @@ def test_generate_offers(sample_transaction_data, sample_customer_segments):
     assert len(offers) > 0
     
     # Check first customer's offers
-    customer_id = list(offers.keys())[0]
+    customer_id = next(iter(offers))
     customer_offers = offers[customer_id]
     
     assert len(customer_offers) <= 3
@@ -208,7 +207,7 @@ def test_generate_offers_invalid_segments():
     # Create data with mismatched customer IDs
     transaction_data = pd.DataFrame({
         'customer_id': ['CUST001', 'CUST002'],
-        'transaction_timestamp': [datetime.now()] * 2,
+        'transaction_timestamp': pd.Timestamp.now(),
         'total_amount': [100.0, 200.0],
         'banner': ['Sobeys'] * 2,
         'points_earned': [100, 200],
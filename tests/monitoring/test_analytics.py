@@ -7,6 +7,7 @@ import numpy as np
 from datetime import datetime, timedelta
 
 from src.monitoring.analytics import (
+    _events_since,
     OfferAnalytics,
     PerformanceAnalytics,
     CustomerAnalytics,
@@ -47,6 +48,43 @@ def test_analyze_offer_performance(sample_offer_events, sample_customer_segments
     assert 'days' in performance['time_period']
 
 
+def test_conversion_rates_match_event_slices(
+    sample_offer_events,
+    sample_offer_events_by_type,
+    sample_customer_segments
+):
+    """Test conversion rates agree with the per-type event counts."""
+    analytics = OfferAnalytics()
+    performance = analytics.analyze_offer_performance(
+        sample_offer_events,
+        sample_customer_segments
+    )
+    counts = {event_type: len(events) for event_type, events in sample_offer_events_by_type.items()}
+    
+    assert performance['conversion_rates'] == pytest.approx(
+        analytics._calculate_conversion_rates(counts)
+    )
+
+
+def test_analyze_offer_performance_in_chunks(sample_offer_events, sample_customer_segments):
+    """Test chunked offer events give the same metrics as one frame."""
+    analytics = OfferAnalytics()
+    whole = analytics.analyze_offer_performance(
+        sample_offer_events,
+        sample_customer_segments
+    )
+    chunked = analytics.analyze_offer_performance(
+        (sample_offer_events.iloc[i:i + 30] for i in range(0, len(sample_offer_events), 30)),
+        sample_customer_segments
+    )
+    
+    assert chunked['conversion_rates'] == pytest.approx(whole['conversion_rates'])
+    for section in ('segment_performance', 'offer_type_performance'):
+        assert chunked[section].keys() == whole[section].keys()
+        for key, metrics in whole[section].items():
+            assert chunked[section][key] == pytest.approx(metrics)
+
+
 def test_analyze_segment_performance(sample_offer_events, sample_customer_segments):
     """Test segment performance analysis."""
     analytics = OfferAnalytics()
@@ -58,7 +96,7 @@ def test_analyze_segment_performance(sample_offer_events, sample_customer_segmen
     assert len(performance) > 0
     
     # Check metrics for first segment
-    first_segment = list(performance.keys())[0]
+    first_segment = next(iter(performance))
     segment_metrics = performance[first_segment]
     
     assert 'offer_count' in segment_metrics
@@ -75,7 +113,7 @@ def test_analyze_offer_types(sample_offer_events):
     assert len(performance) > 0
     
     # Check metrics for first offer type
-    first_type = list(performance.keys())[0]
+    first_type = next(iter(performance))
     type_metrics = performance[first_type]
     
     assert 'count' in type_metrics
@@ -84,6 +122,20 @@ def test_analyze_offer_types(sample_offer_events):
     assert 'average_value' in type_metrics
 
 
+def test_events_since_sorted_matches_mask(sample_offer_events):
+    """Test lookback slicing of time-ordered events matches the mask."""
+    cutoff = datetime.now() - timedelta(days=10)
+    expected = sample_offer_events[sample_offer_events['timestamp'] >= cutoff]
+    
+    sorted_events = sample_offer_events.sort_values('timestamp')
+    recent = _events_since(sorted_events, cutoff)
+    
+    assert sorted(recent['event_id']) == sorted(expected['event_id'])
+    
+    unsorted = _events_since(sample_offer_events, cutoff)
+    assert unsorted['event_id'].tolist() == expected['event_id'].tolist()
+
+
 def test_api_performance_analysis(sample_api_metrics):
     """Test API performance analysis."""
     analytics = PerformanceAnalytics()
@@ -102,7 +154,7 @@ def test_api_performance_analysis(sample_api_metrics):
     
     # Check endpoint metrics
     assert len(performance['endpoints']) > 0
-    first_endpoint = list(performance['endpoints'].keys())[0]
+    first_endpoint = next(iter(performance['endpoints']))
     endpoint_metrics = performance['endpoints'][first_endpoint]
     
     assert 'request_count' in endpoint_metrics
@@ -119,7 +171,7 @@ def test_model_performance_analysis(sample_model_metrics):
     assert len(performance) > 0
     
     # Check metrics for first model
-    first_model = list(performance.keys())[0]
+    first_model = next(iter(performance))
     model_metrics = performance[first_model]
     
     assert 'prediction_count' in model_metrics
@@ -157,7 +209,7 @@ def test_segment_engagement_analysis(sample_offer_events):
     assert len(engagement) > 0
     
     # Check metrics for first segment
-    first_segment = list(engagement.keys())[0]
+    first_segment = next(iter(engagement))
     segment_metrics = engagement[first_segment]
     
     assert 'customer_count' in segment_metrics
@@ -181,6 +233,7 @@ def test_engagement_timeseries(sample_offer_events):
     assert len(time_series['dates']) == len(time_series['average_points'])
 
 
+@pytest.mark.slow
 def test_generate_analytics_report(
     sample_offer_events,
     sample_customer_segments,
@@ -230,21 +283,18 @@ def test_generate_analytics_report(
     assert output_file.exists()
 
 
-def test_analytics_with_empty_data():
+@pytest.mark.parametrize("analytics_cls,method,n_inputs,key,expected", [
+    (OfferAnalytics, 'analyze_offer_performance', 2, 'conversion_rates', {}),
+    (PerformanceAnalytics, 'analyze_api_performance', 1, None, Exception),
+    (CustomerAnalytics, 'analyze_customer_engagement', 2, 'active_customers', 0)
+], ids=['offer', 'performance', 'customer'])
+def test_analytics_with_empty_data(analytics_cls, method, n_inputs, key, expected):
     """Test analytics with empty data."""
-    empty_data = pd.DataFrame()
-    
-    # Test offer analytics
-    offer_analytics = OfferAnalytics()
-    performance = offer_analytics.analyze_offer_performance(empty_data, empty_data)
-    assert performance['conversion_rates'] == {}
-    
-    # Test performance analytics
-    performance_analytics = PerformanceAnalytics()
-    with pytest.raises(Exception):
-        performance_analytics.analyze_api_performance(empty_data)
-    
-    # Test customer analytics
-    customer_analytics = CustomerAnalytics()
-    engagement = customer_analytics.analyze_customer_engagement(empty_data, empty_data)
-    assert engagement['active_customers'] == 0 
\ No newline at end of file
+    analyze = getattr(analytics_cls(), method)
+    empty_inputs = [pd.DataFrame()] * n_inputs
+    
+    if key is None:
+        with pytest.raises(expected):
+            analyze(*empty_inputs)
+    else:
+        assert analyze(*empty_inputs)[key] == expected 
\ No newline at end of file
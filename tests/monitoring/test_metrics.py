@@ -1,25 +1,23 @@
 """
 Tests for metrics collection module.
 """
+import asyncio
 import pytest
 import time
+import numpy as np
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
-from src.monitoring.metrics import (
-    REQUEST_COUNT,
-    REQUEST_LATENCY,
-    OFFER_GENERATION_COUNT,
-    OFFER_EVENTS,
-    OFFER_VALUE,
-    ACTIVE_CUSTOMERS,
-    POINTS_BALANCE,
-    MODEL_PREDICTION_LATENCY,
-    CACHE_HITS,
-    CACHE_MISSES,
-    DB_QUERY_LATENCY,
-    DB_CONNECTION_POOL,
+from prometheus_client import CollectorRegistry, Histogram
+
+# Imported under the same name as api.endpoints, so the default registry
+# is populated by a single copy of the module
+from monitoring.metrics import (
     MetricsMiddleware,
+    build_metrics,
+    flush_request_metrics,
+    observe_many,
+    run_metrics_flusher,
     track_offer_generation,
     track_offer_event,
     track_model_prediction,
@@ -31,20 +29,18 @@ from src.monitoring.metrics import (
 
 
 @pytest.fixture
-def reset_metrics():
-    """Reset all metrics before each test."""
-    REQUEST_COUNT._metrics.clear()
-    REQUEST_LATENCY._metrics.clear()
-    OFFER_GENERATION_COUNT._metrics.clear()
-    OFFER_EVENTS._metrics.clear()
-    OFFER_VALUE._metrics.clear()
-    ACTIVE_CUSTOMERS._metrics.clear()
-    POINTS_BALANCE._metrics.clear()
-    MODEL_PREDICTION_LATENCY._metrics.clear()
-    CACHE_HITS._metrics.clear()
-    CACHE_MISSES._metrics.clear()
-    DB_QUERY_LATENCY._metrics.clear()
-    DB_CONNECTION_POOL._metrics.clear()
+def registry():
+    """Registry isolated from the process-wide default."""
+    return CollectorRegistry()
+
+
+@pytest.fixture
+def metrics(monkeypatch, registry):
+    """Fresh metrics on their own registry, recorded to by the code under test."""
+    service_metrics = build_metrics(registry)
+    monkeypatch.setattr('monitoring.metrics._M', service_metrics)
+    monkeypatch.setattr('monitoring.metrics._pending', [])
+    return service_metrics
 
 
 @pytest.fixture
@@ -68,7 +64,7 @@ def mock_app():
 
 
 @pytest.mark.asyncio
-async def test_metrics_middleware(mock_app, reset_metrics):
+async def test_metrics_middleware(mock_app, metrics):
     """Test metrics middleware."""
     middleware = MetricsMiddleware(mock_app)
     
@@ -90,13 +86,59 @@ async def test_metrics_middleware(mock_app, reset_metrics):
     
     # Process request
     await middleware(scope, receive, send)
+    flush_request_metrics()
     
     # Check metrics were recorded
-    assert REQUEST_COUNT._metrics
-    assert REQUEST_LATENCY._metrics
+    assert metrics.request_count._metrics
+    assert metrics.request_latency._metrics
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_labels_route_template(metrics):
+    """Test requests are labelled by route template and status class."""
+    async def app(scope, receive, send):
+        # Routing attaches the matched route to the scope
+        scope["route"] = MagicMock(path="/customer/{customer_id}")
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    
+    async def receive():
+        return {"type": "http.request"}
+    
+    async def send(message):
+        pass
+    
+    middleware = MetricsMiddleware(app)
+    for customer_id in ("CUST001", "CUST002"):
+        scope = {"type": "http", "method": "GET", "path": f"/customer/{customer_id}"}
+        await middleware(scope, receive, send)
+    flush_request_metrics()
+    
+    assert list(metrics.request_count._metrics) == [("/customer/{customer_id}", "GET", "4xx")]
+    assert metrics.request_count.labels("/customer/{customer_id}", "GET", "4xx")._value.get() == 2
+
+
+async def test_metrics_flusher_applies_idle_samples(mock_app, metrics, monkeypatch):
+    """Test the background flusher applies samples with no later request."""
+    monkeypatch.setattr('monitoring.metrics._flushed_at_ns', time.perf_counter_ns())
+    
+    async def receive():
+        return {"type": "http.request"}
+    
+    async def send(message):
+        pass
+    
+    await MetricsMiddleware(mock_app)({"type": "http", "method": "GET", "path": "/test"}, receive, send)
+    assert not metrics.request_count._metrics
+    
+    flusher = asyncio.create_task(run_metrics_flusher(interval=0.01))
+    await asyncio.sleep(0.05)
+    flusher.cancel()
+    
+    assert metrics.request_count.labels("unmatched", "GET", "2xx")._value.get() == 1
 
 
-def test_track_offer_generation(reset_metrics):
+def test_track_offer_generation(metrics):
     """Test offer generation tracking."""
     offer = {
         'offer_type': 'points_multiplier',
@@ -106,34 +148,52 @@ def test_track_offer_generation(reset_metrics):
     
     track_offer_generation(offer, segment)
     
-    assert OFFER_GENERATION_COUNT._metrics
-    assert OFFER_VALUE._metrics
+    assert metrics.offer_generation_count._metrics
+    assert metrics.offer_value._metrics
 
 
-def test_track_offer_event(reset_metrics):
+def test_track_offer_event(metrics):
     """Test offer event tracking."""
     track_offer_event('view', 'points_multiplier')
     track_offer_event('redeem', 'points_bonus')
     
-    assert OFFER_EVENTS._metrics
-    assert len(OFFER_EVENTS._metrics) == 2
+    assert metrics.offer_events._metrics
+    assert len(metrics.offer_events._metrics) == 2
+
+
+def test_track_offer_event_metadata_not_labelled(metrics):
+    """Test event metadata never adds offer event series."""
+    for i in range(1000):
+        track_offer_event('view', 'points_multiplier', source='test', request_id=f'REQ{i}')
+    
+    assert list(metrics.offer_events._metrics) == [('view', 'points_multiplier')]
+
+
+def test_labelled_children_resolved_once(metrics):
+    """Test repeated tracking reuses the labelled child."""
+    for _ in range(3):
+        track_offer_event('view', 'points_multiplier')
+        track_cache_operation('customer_profiles', True)
+    
+    assert len(metrics.children) == 2
+    assert metrics.offer_events.labels('view', 'points_multiplier')._value.get() == 3
 
 
-def test_track_model_prediction(reset_metrics):
+def test_track_model_prediction(metrics):
     """Test model prediction tracking."""
     track_model_prediction('customer_segmentation', 0.1)
     
-    assert MODEL_PREDICTION_LATENCY._metrics
+    assert metrics.model_prediction_latency._metrics
 
 
-def test_track_db_operation(reset_metrics):
+def test_track_db_operation(metrics):
     """Test database operation tracking."""
     track_db_operation('query', 0.05)
     
-    assert DB_QUERY_LATENCY._metrics
+    assert metrics.db_query_latency._metrics
 
 
-def test_update_customer_metrics(reset_metrics):
+def test_update_customer_metrics(metrics, registry):
     """Test customer metrics updates."""
     points_by_segment = {
         'high_value': 1000.0,
@@ -143,104 +203,144 @@ def test_update_customer_metrics(reset_metrics):
     
     update_customer_metrics(100, points_by_segment)
     
-    assert ACTIVE_CUSTOMERS._metrics
-    assert POINTS_BALANCE._metrics
+    assert registry.get_sample_value('scene_plus_active_customers') == 100
+    assert metrics.points_balance._metrics
 
 
-def test_track_cache_operation(reset_metrics):
+def test_track_cache_operation(metrics):
     """Test cache operation tracking."""
     track_cache_operation('customer_profiles', True)
     track_cache_operation('offer_templates', False)
     
-    assert CACHE_HITS._metrics
-    assert CACHE_MISSES._metrics
+    assert metrics.cache_hits._metrics
+    assert metrics.cache_misses._metrics
 
 
-def test_update_db_connections(reset_metrics):
+def test_update_db_connections(metrics):
     """Test database connection tracking."""
     update_db_connections(5, 10, 20)
     
-    assert DB_CONNECTION_POOL._metrics
+    assert metrics.db_connection_pool._metrics
 
 
-def test_request_count_labels(reset_metrics):
+def test_request_count_labels(metrics):
     """Test request count metric labels."""
-    REQUEST_COUNT.labels(
-        endpoint='/test',
+    metrics.request_count.labels(
+        endpoint='/customer/{customer_id}',
         method='GET',
-        status=200
+        status='2xx'
     ).inc()
     
-    REQUEST_COUNT.labels(
-        endpoint='/test',
+    metrics.request_count.labels(
+        endpoint='/customer/{customer_id}',
         method='POST',
-        status=400
+        status='4xx'
     ).inc()
     
-    assert len(REQUEST_COUNT._metrics) == 2
+    assert len(metrics.request_count._metrics) == 2
 
 
-def test_request_latency_buckets(reset_metrics):
+def test_request_latency_buckets(metrics):
     """Test request latency histogram buckets."""
-    REQUEST_LATENCY.labels(
+    metrics.request_latency.labels(
         endpoint='/test',
         method='GET'
     ).observe(0.1)
     
-    REQUEST_LATENCY.labels(
+    metrics.request_latency.labels(
         endpoint='/test',
         method='GET'
     ).observe(1.0)
     
-    assert REQUEST_LATENCY._metrics
+    assert metrics.request_latency._metrics
 
 
-def test_offer_value_distribution(reset_metrics):
+def test_offer_value_distribution(metrics):
     """Test offer value distribution tracking."""
     values = [10, 50, 100, 500, 1000]
     for value in values:
-        OFFER_VALUE.labels(
+        metrics.offer_value.labels(
             offer_type='points_bonus'
         ).observe(value)
     
-    assert OFFER_VALUE._metrics
+    assert metrics.offer_value._metrics
 
 
-def test_points_balance_summary(reset_metrics):
+def test_offer_value_distribution_bulk(metrics):
+    """Test bulk offer value observations match one observe() per value."""
+    values = [5, 10, 50, 100, 500, 1000, 5000]
+    for value in values:
+        metrics.offer_value.labels(offer_type='points_bonus').observe(value)
+    observe_many(metrics.offer_value.labels(offer_type='points_multiplier'), np.array(values))
+    
+    looped = metrics.offer_value.labels(offer_type='points_bonus')
+    bulk = metrics.offer_value.labels(offer_type='points_multiplier')
+    assert [b.get() for b in bulk._buckets] == [b.get() for b in looped._buckets]
+    assert bulk._sum.get() == looped._sum.get()
+
+
+def test_points_balance_summary_bulk(metrics):
+    """Test bulk points balance observations update count and sum."""
+    observe_many(metrics.points_balance.labels(segment='high_value'), [100, 500, 1000])
+    
+    child = metrics.points_balance.labels(segment='high_value')
+    assert child._count.get() == 3
+    assert child._sum.get() == 1600
+
+
+def test_points_balance_summary(metrics):
     """Test points balance summary statistics."""
     balances = [100, 500, 1000, 5000, 10000]
     for balance in balances:
-        POINTS_BALANCE.labels(
+        metrics.points_balance.labels(
             segment='high_value'
         ).observe(balance)
     
-    assert POINTS_BALANCE._metrics
+    assert metrics.points_balance._metrics
 
 
-def test_model_prediction_latency_buckets(reset_metrics):
+def test_model_prediction_latency_buckets(metrics):
     """Test model prediction latency histogram buckets."""
     latencies = [0.01, 0.05, 0.1, 0.25]
     for latency in latencies:
-        MODEL_PREDICTION_LATENCY.labels(
+        metrics.model_prediction_latency.labels(
             model_name='customer_segmentation'
         ).observe(latency)
     
-    assert MODEL_PREDICTION_LATENCY._metrics
+    assert metrics.model_prediction_latency._metrics
+
+
+def test_histogram_buckets_match_stock_observe(metrics):
+    """Test binary-search bucketing matches the client's linear scan."""
+    stock = Histogram(
+        'stock_db_query_seconds', 'Stock histogram', ['operation'],
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+        registry=CollectorRegistry()
+    ).labels(operation='select')
+    fast = metrics.db_query_latency.labels(operation='select')
+    
+    # Includes exact bounds, which belong to their own bucket
+    for latency in [0.0, 0.01, 0.011, 0.05, 0.3, 1.0, 2.0]:
+        stock.observe(latency)
+        fast.observe(latency)
+    
+    assert [b.get() for b in fast._buckets] == [b.get() for b in stock._buckets]
+    assert fast._sum.get() == stock._sum.get()
 
 
-def test_db_query_latency_buckets(reset_metrics):
+def test_db_query_latency_buckets(metrics):
     """Test database query latency histogram buckets."""
     latencies = [0.01, 0.05, 0.1, 0.5]
     for latency in latencies:
-        DB_QUERY_LATENCY.labels(
+        metrics.db_query_latency.labels(
             operation='select'
         ).observe(latency)
     
-    assert DB_QUERY_LATENCY._metrics
+    assert metrics.db_query_latency._metrics
 
 
 @pytest.mark.asyncio
-async def test_metrics_middleware_error_handling(mock_app, reset_metrics):
+async def test_metrics_middleware_error_handling(mock_app, metrics):
     """Test metrics middleware error handling."""
     middleware = MetricsMiddleware(mock_app)
     
@@ -261,5 +361,5 @@ async def test_metrics_middleware_error_handling(mock_app, reset_metrics):
     await middleware(scope, receive, send)
     
     # Check no metrics were recorded
-    assert not REQUEST_COUNT._metrics
-    assert not REQUEST_LATENCY._metrics 
\ No newline at end of file
+    assert not metrics.request_count._metrics
+    assert not metrics.request_latency._metrics 
\ No newline at end of file
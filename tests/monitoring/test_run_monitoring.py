@@ -0,0 +1,51 @@
+"""
+Tests for monitoring runner helpers.
+"""
+import socket
+from urllib.request import urlopen
+
+from prometheus_client import CollectorRegistry, Counter, generate_latest
+
+from src.monitoring import run_monitoring
+from src.monitoring.run_monitoring import CachedCollector, start_metrics_server
+
+
+def _cached_registry(ttl: float):
+    """A counter's registry and a scrape registry caching it for ttl seconds."""
+    source = CollectorRegistry()
+    counter = Counter('scene_plus_test_total', 'Test counter', registry=source)
+    scrape = CollectorRegistry()
+    scrape.register(CachedCollector(source, ttl=ttl))
+    return counter, scrape
+
+
+def test_cached_collector_reuses_recent_scrape():
+    """Test scrapes within the ttl return byte-identical bodies."""
+    counter, scrape = _cached_registry(ttl=60)
+    first = generate_latest(scrape)
+    counter.inc()
+    
+    assert generate_latest(scrape) == first
+
+
+def test_cached_collector_refreshes_after_ttl():
+    """Test an expired cache collects fresh samples."""
+    counter, scrape = _cached_registry(ttl=0)
+    first = generate_latest(scrape)
+    counter.inc()
+    
+    assert generate_latest(scrape) != first
+
+
+def test_start_metrics_server_serves_scrapes(monkeypatch):
+    """Test the metrics server answers a scrape with the default registry's samples."""
+    monkeypatch.setattr(run_monitoring, 'METRICS_MULTIPROC_DIR', None)
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        port = sock.getsockname()[1]
+    
+    start_metrics_server(port)
+    
+    with urlopen(f'http://localhost:{port}/metrics', timeout=5) as response:
+        assert response.status == 200
+        assert b'python_info' in response.read()
@@ -1,18 +1,32 @@
 """
 Tests for Scene+ recommendation API.
 """
+import json
 import pytest
-from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport, AsyncClient
 from datetime import datetime, timedelta
 
 from api.endpoints import app
+from data_pipeline.connectors.postgres import PostgresConnector
 from api.models import CustomerProfile, OfferRequest, OfferEvent
 
 
-@pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
+@pytest.fixture(scope="module")
+async def client():
+    """Async client calling the app in-process, shared by the module's tests.
+    
+    LifespanManager runs the startup and shutdown hooks, which ASGITransport
+    skips, so app.state holds the database connector and offer batcher. The
+    connector's pool is never opened, as tests run without a database.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(PostgresConnector, "connect", AsyncMock())
+        mp.setattr(PostgresConnector, "disconnect", AsyncMock())
+        async with LifespanManager(app) as manager:
+            async with AsyncClient(transport=ASGITransport(app=manager.app), base_url="http://test") as client:
+                yield client
 
 
 @pytest.fixture
@@ -27,18 +41,20 @@ def sample_offer_id():
     return "OFFER123"
 
 
-def test_health_check(client):
+@pytest.mark.asyncio(scope="module")
+async def test_health_check(client):
     """Test health check endpoint."""
-    response = client.get("/health")
+    response = await client.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
     assert "timestamp" in data
 
 
-def test_get_customer_profile(client, sample_customer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_get_customer_profile(client, sample_customer_id):
     """Test getting customer profile."""
-    response = client.get(f"/customer/{sample_customer_id}")
+    response = await client.get(f"/customer/{sample_customer_id}")
     assert response.status_code == 200
     data = response.json()
     assert data["customer_id"] == sample_customer_id
@@ -46,16 +62,18 @@ def test_get_customer_profile(client, sample_customer_id):
     assert "total_points" in data
 
 
-def test_get_customer_profile_not_found(client):
+@pytest.mark.asyncio(scope="module")
+async def test_get_customer_profile_not_found(client):
     """Test getting non-existent customer profile."""
-    response = client.get("/customer/NONEXISTENT")
+    response = await client.get("/customer/NONEXISTENT")
     assert response.status_code == 404
     data = response.json()
     assert "error_code" in data
     assert data["error_code"] == "404"
 
 
-def test_generate_offers(client, sample_customer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_generate_offers(client, sample_customer_id):
     """Test generating offers."""
     request = {
         "customer_id": sample_customer_id,
@@ -63,15 +81,16 @@ def test_generate_offers(client, sample_customer_id):
         "context": {"source": "test"}
     }
     
-    response = client.post("/offers/generate", json=request)
+    response = await client.post("/offers/generate", json=request)
     assert response.status_code == 200
-    data = response.json()
-    assert data["customer_id"] == sample_customer_id
-    assert len(data["offers"]) == 3
-    assert "generated_at" in data
+    assert response.headers["content-type"] == "application/x-ndjson"
+    header, *offers = [json.loads(line) for line in response.iter_lines()]
+    assert header["customer_id"] == sample_customer_id
+    assert len(offers) == 3
+    assert "generated_at" in header
     
     # Check offer structure
-    offer = data["offers"][0]
+    offer = offers[0]
     assert "offer_id" in offer
     assert "offer_type" in offer
     assert "value" in offer
@@ -80,7 +99,8 @@ def test_generate_offers(client, sample_customer_id):
     assert "end_date" in offer
 
 
-def test_generate_offers_invalid_count(client, sample_customer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_generate_offers_invalid_count(client, sample_customer_id):
     """Test generating offers with invalid count."""
     request = {
         "customer_id": sample_customer_id,
@@ -88,11 +108,12 @@ def test_generate_offers_invalid_count(client, sample_customer_id):
         "context": {}
     }
     
-    response = client.post("/offers/generate", json=request)
+    response = await client.post("/offers/generate", json=request)
     assert response.status_code == 422  # Validation error
 
 
-def test_track_offer_event(client, sample_customer_id, sample_offer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_track_offer_event(client, sample_customer_id, sample_offer_id):
     """Test tracking offer events."""
     event = {
         "event_id": "EVENT123",
@@ -102,7 +123,7 @@ def test_track_offer_event(client, sample_customer_id, sample_offer_id):
         "metadata": {"source": "test"}
     }
     
-    response = client.post("/offers/track", json=event)
+    response = await client.post("/offers/track", json=event)
     assert response.status_code == 200
     data = response.json()
     assert data["event_id"] == event["event_id"]
@@ -110,7 +131,8 @@ def test_track_offer_event(client, sample_customer_id, sample_offer_id):
     assert data["offer_id"] == sample_offer_id
 
 
-def test_track_offer_event_invalid_type(client, sample_customer_id, sample_offer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_track_offer_event_invalid_type(client, sample_customer_id, sample_offer_id):
     """Test tracking offer events with invalid type."""
     event = {
         "event_id": "EVENT123",
@@ -120,16 +142,17 @@ def test_track_offer_event_invalid_type(client, sample_customer_id, sample_offer
         "metadata": {}
     }
     
-    response = client.post("/offers/track", json=event)
+    response = await client.post("/offers/track", json=event)
     assert response.status_code == 400
     data = response.json()
     assert "error_code" in data
     assert "valid_events" in data["message"].lower()
 
 
-def test_get_offer(client, sample_offer_id):
+@pytest.mark.asyncio(scope="module")
+async def test_get_offer(client, sample_offer_id):
     """Test getting offer details."""
-    response = client.get(f"/offers/{sample_offer_id}")
+    response = await client.get(f"/offers/{sample_offer_id}")
     assert response.status_code == 200
     data = response.json()
     assert data["offer_id"] == sample_offer_id
@@ -138,18 +161,20 @@ def test_get_offer(client, sample_offer_id):
     assert "conditions" in data
 
 
-def test_get_offer_not_found(client):
+@pytest.mark.asyncio(scope="module")
+async def test_get_offer_not_found(client):
     """Test getting non-existent offer."""
-    response = client.get("/offers/NONEXISTENT")
+    response = await client.get("/offers/NONEXISTENT")
     assert response.status_code == 404
     data = response.json()
     assert "error_code" in data
     assert data["error_code"] == "404"
 
 
-def test_error_response_format(client):
+@pytest.mark.asyncio(scope="module")
+async def test_error_response_format(client):
     """Test error response format."""
-    response = client.get("/nonexistent/endpoint")
+    response = await client.get("/nonexistent/endpoint")
     assert response.status_code == 404
     data = response.json()
     assert "error_code" in data
@@ -0,0 +1,128 @@
+"""
+Tests for API request batching.
+"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from api.batching import OfferBatcher
+from src.models.recommendation import ModelError, RecommendationEngine
+
+
+def _customer_request(transactions, segments, customer_id):
+    """One customer's transactions (with segment) and segment rows."""
+    customer_segments = segments[segments['customer_id'] == customer_id]
+    customer_data = transactions[transactions['customer_id'] == customer_id].assign(
+        segment=customer_segments['segment'].iloc[0]
+    )
+    return customer_data, customer_segments
+
+
+def _summary(offers):
+    """Offer fields that do not depend on generation time."""
+    return [
+        (offer.offer_type, offer.value, offer.conditions, offer.target_banners, offer.target_categories)
+        for offer in offers
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batched_offers_match_unbatched(sample_transaction_data, sample_customer_segments):
+    """Test offers do not depend on which requests share a batch."""
+    engine = RecommendationEngine()
+    customer_ids = sample_customer_segments['customer_id'].head(3).tolist()
+    requests = [
+        _customer_request(sample_transaction_data, sample_customer_segments, customer_id)
+        for customer_id in customer_ids
+    ]
+    
+    expected = [
+        _summary(engine.generate_offers(customer_data, segments, n_offers=3).get(customer_id, []))
+        for customer_id, (customer_data, segments) in zip(customer_ids, requests)
+    ]
+    
+    batcher = OfferBatcher(engine, max_wait_ms=50)
+    await batcher.start()
+    try:
+        # The first customer is requested twice in the same batch
+        results = await asyncio.gather(*(
+            batcher.submit(customer_id, customer_data, segments, 3)
+            for customer_id, (customer_data, segments) in zip(
+                customer_ids + customer_ids[:1], requests + requests[:1]
+            )
+        ))
+    finally:
+        await batcher.stop()
+    
+    assert [_summary(offers) for offers in results] == expected + expected[:1]
+
+
+@pytest.mark.asyncio
+async def test_batched_offers_respect_each_count(sample_transaction_data, sample_customer_segments):
+    """Test requests for one customer with different counts each get their own count."""
+    engine = RecommendationEngine()
+    customer_id = sample_customer_segments['customer_id'].iloc[0]
+    customer_data, segments = _customer_request(
+        sample_transaction_data, sample_customer_segments, customer_id
+    )
+    expected = _summary(engine.generate_offers(customer_data, segments, n_offers=1).get(customer_id, []))
+    
+    batcher = OfferBatcher(engine, max_wait_ms=50)
+    await batcher.start()
+    try:
+        one, three = await asyncio.gather(
+            batcher.submit(customer_id, customer_data, segments, 1),
+            batcher.submit(customer_id, customer_data, segments, 3)
+        )
+    finally:
+        await batcher.stop()
+    
+    assert _summary(one) == expected
+    assert len(three) <= 3
+
+
+@pytest.mark.asyncio
+async def test_batch_scored_in_one_engine_call(sample_transaction_data, sample_customer_segments):
+    """Test a batch of customers is scored by a single generate_offers call."""
+    engine = MagicMock(wraps=RecommendationEngine())
+    customer_ids = sample_customer_segments['customer_id'].head(3).tolist()
+    
+    batcher = OfferBatcher(engine, max_wait_ms=50)
+    await batcher.start()
+    try:
+        await asyncio.gather(*(
+            batcher.submit(
+                customer_id,
+                *_customer_request(sample_transaction_data, sample_customer_segments, customer_id),
+                3
+            )
+            for customer_id in customer_ids
+        ))
+    finally:
+        await batcher.stop()
+    
+    assert engine.generate_offers.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_request_does_not_fail_batch(sample_transaction_data, sample_customer_segments):
+    """Test a request the engine rejects fails alone."""
+    engine = RecommendationEngine()
+    good_id, bad_id = sample_customer_segments['customer_id'].head(2).tolist()
+    good_data, good_segments = _customer_request(sample_transaction_data, sample_customer_segments, good_id)
+    bad_data, bad_segments = _customer_request(sample_transaction_data, sample_customer_segments, bad_id)
+    expected = _summary(engine.generate_offers(good_data, good_segments, n_offers=3).get(good_id, []))
+    
+    batcher = OfferBatcher(engine, max_wait_ms=50)
+    await batcher.start()
+    try:
+        good, bad = await asyncio.gather(
+            batcher.submit(good_id, good_data, good_segments, 3),
+            batcher.submit(bad_id, bad_data.drop(columns='items'), bad_segments, 3),
+            return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+    
+    assert _summary(good) == expected
+    assert isinstance(bad, ModelError)